@@ -0,0 +1,85 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from recipes.models import Ingredient, Tag
+from rest_framework.renderers import JSONRenderer
+
+from .reference_data import get_data_key, get_etag
+from .views import IngredientViewSet, ShoppingCartViewSet, TagViewSet
+
+# Cache backends querying the database, which is not allowed in the loop.
+DATABASE_CACHES = ('django.core.cache.backends.db.DatabaseCache',)
+
+
+def get_cached_data(model, request):
+    '''ETag of the model's data and the response data cached for it.'''
+    etag = get_etag(model)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return etag, None
+    return etag, cache.get(get_data_key(etag, request))
+
+
+def cache_lookup(func):
+    '''Coroutine calling func in the event loop, or in a thread when the
+    default cache is kept in the database.'''
+    if settings.CACHES['default']['BACKEND'] in DATABASE_CACHES:
+        return sync_to_async(func)
+
+    async def lookup(*args):
+        return func(*args)
+
+    return lookup
+
+
+def reference_data_view(model, view):
+    '''Serve cached tags or ingredients right in the event loop.
+
+    Only cache lookups are made on a hit, so no worker thread is taken
+    unless the cache is in the database. A miss falls back to the DRF
+    view run in a thread, which fills the cache shared with WSGI workers.
+    '''
+    view = sync_to_async(view)
+    lookup = cache_lookup(get_cached_data)
+
+    async def reference_data(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await view(request, *args, **kwargs)
+        etag, data = await lookup(model, request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif data is not None:
+            response = HttpResponse(JSONRenderer().render(data),
+                                    content_type='application/json')
+        else:
+            return await view(request, *args, **kwargs)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True,
+                            max_age=settings.REFERENCE_DATA_MAX_AGE)
+        return response
+
+    reference_data.csrf_exempt = True
+    return reference_data
+
+
+tag_list = reference_data_view(
+    Tag, TagViewSet.as_view({'get': 'list'}))
+ingredient_list = reference_data_view(
+    Ingredient, IngredientViewSet.as_view({'get': 'list'}))
+
+download_view = sync_to_async(
+    ShoppingCartViewSet.as_view({'get': 'download_shopping_cart'}))
+
+
+async def download_shopping_cart(request):
+    '''Render the shopping list in a worker thread, not the event loop.'''
+    response = await download_view(request)
+    if response.streaming:
+        content = await sync_to_async(b''.join)(response.streaming_content)
+        response.streaming_content = (content,)
+    return response
+
+
+download_shopping_cart.csrf_exempt = True
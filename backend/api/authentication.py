@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from users.models import User
+
+from .checks import PROCESS_CACHES
+
+TOKEN_KEY = 'auth_token:{digest}'
+
+# Fields of the user kept in the cache. The password hash and counters are
+# left deferred and loaded from the database only when accessed.
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name',
+               'is_active', 'is_staff', 'is_superuser')
+
+
+def get_digest(key):
+    '''Hash of the token, so that raw tokens never become cache keys.'''
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class LocalTokenCache:
+    '''Bounded LRU of users of tokens recently used in this worker.'''
+
+    def __init__(self):
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, digest):
+        with self.lock:
+            values, expires = self.tokens.get(digest, (None, None))
+            if values is None:
+                return None
+            if expires < time.monotonic():
+                del self.tokens[digest]
+                return None
+            self.tokens.move_to_end(digest)
+            return values
+
+    def set(self, digest, values):
+        options = settings.AUTH_TOKEN_CACHE
+        with self.lock:
+            self.tokens[digest] = (
+                values, time.monotonic() + options['LOCAL_TIMEOUT'])
+            self.tokens.move_to_end(digest)
+            while len(self.tokens) > options['LOCAL_SIZE']:
+                self.tokens.popitem(last=False)
+
+    def delete(self, digest):
+        with self.lock:
+            self.tokens.pop(digest, None)
+
+
+local_tokens = LocalTokenCache()
+
+
+def is_shared_cache():
+    '''Whether the default cache is seen by all worker processes.'''
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_CACHES
+
+
+def build_user(values):
+    '''User with cached field values, the other fields are deferred.'''
+    fields = [field.attname for field in User._meta.concrete_fields
+              if field.attname in values]
+    return User.from_db(router.db_for_read(User), fields,
+                        [values[field] for field in fields])
+
+
+def invalidate_tokens(keys):
+    '''Forget cached tokens, e.g. on logout or password change.'''
+    digests = [get_digest(key) for key in keys]
+    for digest in digests:
+        local_tokens.delete(digest)
+    cache.delete_many([TOKEN_KEY.format(digest=digest) for digest in digests])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''Token authentication without a database query for known tokens.
+
+    Only USER_FIELDS of the token's user are cached, under a hash of the
+    token, for LOCAL_TIMEOUT seconds in the worker's LRU and, when the
+    default cache is shared by processes, for TIMEOUT seconds there. The
+    user and the token are rebuilt from them and the key of the request.
+    Deleting a token or saving its user drops both entries, other workers
+    keep accepting the token for at most LOCAL_TIMEOUT seconds.
+    '''
+
+    def authenticate_credentials(self, key):
+        digest = get_digest(key)
+        values = local_tokens.get(digest)
+        if values is None:
+            shared = is_shared_cache()
+            cache_key = TOKEN_KEY.format(digest=digest)
+            values = cache.get(cache_key) if shared else None
+            if values is None:
+                user, _ = super().authenticate_credentials(key)
+                values = {field: getattr(user, field) for field in USER_FIELDS}
+                if shared:
+                    cache.set(cache_key, values,
+                              settings.AUTH_TOKEN_CACHE['TIMEOUT'])
+            local_tokens.set(digest, values)
+        user = build_user(values)
+        return user, self.get_model()(key=key, user=user)
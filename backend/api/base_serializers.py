@@ -1,15 +1,58 @@
+from django.conf import settings
+from django.http import Http404
 from recipes.models import Recipe
 from rest_framework import serializers
 from users.models import User
 
 from .default_for_fields import CurrentID
+from .identity_map import get_request_object
+from .images import get_rendition_url
+
+BULK_MAX_IDS = getattr(settings, 'BULK_MAX_IDS', 100)
+
+
+class ThumbnailsField(serializers.Field):
+    '''URLs of recipe image thumbnails by rendition name.'''
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        thumbnails = {}
+        for label in settings.IMAGE_RENDITIONS:
+            url = get_rendition_url(recipe, label)
+            if url is not None and request is not None:
+                url = request.build_absolute_uri(url)
+            thumbnails[label] = url
+        return thumbnails
+
+
+class RequestObjectField(serializers.PrimaryKeyRelatedField):
+    '''Related object by id, shared with other lookups of the request.'''
+
+    def to_internal_value(self, data):
+        request = self.context.get('request')
+        if request is None:
+            return super().to_internal_value(data)
+        try:
+            return get_request_object(
+                request, self.get_queryset().model, int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except Http404:
+            self.fail('does_not_exist', pk_value=data)
 
 
 class EmbeddedRecipeSerializer(serializers.ModelSerializer):
     '''Serializer for Recipe model with less number of fields.'''
 
+    thumbnails = ThumbnailsField()
+
     class Meta:
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
         model = Recipe
 
 
@@ -20,7 +63,7 @@ class BaseSubscribeSerializer(serializers.ModelSerializer):
         queryset=User.objects.all(),
         default=serializers.CurrentUserDefault()
     )
-    id = serializers.PrimaryKeyRelatedField(
+    id = RequestObjectField(
         source='author',
         queryset=User.objects.all(),
         default=CurrentID(User)
@@ -34,18 +77,16 @@ class BaseUserRecipeSerializer(serializers.ModelSerializer):
         queryset=User.objects.all(),
         default=serializers.CurrentUserDefault()
     )
-    id = serializers.PrimaryKeyRelatedField(
+    id = RequestObjectField(
         queryset=Recipe.objects.all(),
         source='recipe',
         default=CurrentID(Recipe)
     )
 
     def create(self, validated_data):
-        user = validated_data.get('user')
-        id = validated_data.get('id')
         return self.Meta.model.objects.create(
-            user=user,
-            recipe=id
+            user=validated_data['user'],
+            recipe=validated_data['recipe']
         )
 
     def to_representation(self, instance):
@@ -55,3 +96,13 @@ class BaseUserRecipeSerializer(serializers.ModelSerializer):
                 'request': self.context.get('request')
             }
         ).data
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    '''List of object ids for batch endpoints.'''
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_IDS
+    )
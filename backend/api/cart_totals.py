@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, Sum, Value, When
+from django.db.models.functions import Greatest
+from recipes.models import RecipeIngredient, ShoppingCart, ShoppingCartTotal
+
+from .units import base_amount, base_unit, present
+
+BATCH_SIZE = 1000
+
+
+def get_amounts(recipe_ids):
+    '''Amounts of ingredients summed over the recipes.'''
+    return dict(
+        RecipeIngredient.objects.filter(recipe__in=recipe_ids).order_by()
+        .values('ingredient').annotate(total=Sum('amount'))
+        .values_list('ingredient', 'total')
+    )
+
+
+@transaction.atomic
+def change_cart_totals(user_ids, deltas):
+    '''Add ingredient amounts, negative to subtract, to users' totals.
+
+    Missing rows are inserted empty first, so that all of them are changed
+    by one UPDATE; rows which dropped to zero are deleted.
+    '''
+    user_ids = list(user_ids)
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    ShoppingCartTotal.objects.bulk_create(
+        (ShoppingCartTotal(user_id=user_id, ingredient_id=pk, amount=0)
+         for user_id in user_ids
+         for pk, delta in deltas.items() if delta > 0),
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    totals = ShoppingCartTotal.objects.filter(
+        user__in=user_ids, ingredient__in=deltas)
+    totals.update(amount=Greatest(F('amount') + Case(
+        *(When(ingredient=pk, then=Value(delta))
+          for pk, delta in deltas.items()),
+        output_field=IntegerField()
+    ), 0))
+    totals.filter(amount=0).delete()
+
+
+def change_cart_recipes(user_ids, recipe_ids, sign=1):
+    '''Add ingredients of recipes to users' totals, or remove with -1.'''
+    change_cart_totals(user_ids, {
+        pk: sign * amount for pk, amount in get_amounts(recipe_ids).items()
+    })
+
+
+def get_cart_totals(user):
+    '''Totals of the user's ingredients of one name summed in base units.
+
+    The first and the last of the summed units are equal when all of the
+    amount comes in one unit.
+    '''
+    unit = 'ingredient__measurement_unit'
+    return ShoppingCartTotal.objects.filter(user=user).values(
+        name=F('ingredient__name'), unit=base_unit(unit)
+    ).annotate(
+        total=Sum(base_amount('amount', unit)),
+        first_unit=Min(unit), last_unit=Max(unit)
+    ).order_by('name', 'unit')
+
+
+def present_totals(totals):
+    '''Shopping list rows with totals in the most readable units.'''
+    for row in totals.iterator():
+        source_unit = (row['first_unit']
+                       if row['first_unit'] == row['last_unit'] else None)
+        amount, unit = present(row['total'], row['unit'], source_unit)
+        yield {
+            'name': row['name'],
+            'measurement_unit': unit,
+            'amount': amount,
+        }
+
+
+def get_cart_users(recipe):
+    '''Ids of users having the recipe in their shopping list.'''
+    return ShoppingCart.objects.filter(recipe=recipe).values_list(
+        'user', flat=True)
+
+
+@transaction.atomic
+def rebuild_cart_totals():
+    '''Recompute totals of all users from their shopping lists.'''
+    ShoppingCartTotal.objects.all().delete()
+    rows = ShoppingCart.objects.order_by().values(
+        'user', 'recipe__recipe_ingredient__ingredient'
+    ).annotate(total=Sum('recipe__recipe_ingredient__amount')).filter(
+        total__gt=0)
+    ShoppingCartTotal.objects.bulk_create(
+        (ShoppingCartTotal(
+            user_id=row['user'],
+            ingredient_id=row['recipe__recipe_ingredient__ingredient'],
+            amount=row['total'])
+         for row in rows.iterator()),
+        batch_size=BATCH_SIZE
+    )
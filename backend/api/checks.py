@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core import checks
+
+PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register()
+def check_shared_cache(app_configs, **kwargs):
+    '''Warn when several workers would each keep a cache of their own.'''
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.WEB_CONCURRENCY <= 1 or backend not in PROCESS_CACHES:
+        return []
+    return [checks.Warning(
+        f'Default cache {backend} is not shared by the '
+        f'{settings.WEB_CONCURRENCY} workers.',
+        hint=('Versions of tags and ingredients, search and pantry indexes '
+              'and shopping lists go stale in the other workers '
+              'until the entries expire. Set CACHE_BACKEND and '
+              'CACHE_LOCATION to a shared cache, e.g. '
+              'django.core.cache.backends.db.DatabaseCache.'),
+        id='api.W001',
+    )]
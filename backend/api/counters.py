@@ -0,0 +1,7 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def change_counter(queryset, field, delta):
+    '''Atomically add delta to the counter column of queryset rows.'''
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
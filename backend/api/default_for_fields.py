@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from .identity_map import get_request_object
 
 
 class CurrentID:
@@ -10,9 +10,9 @@ class CurrentID:
         self.model = model
 
     def __call__(self, serializer_field):
-        id = serializer_field.context['request'].parser_context.get(
-            'kwargs').get('id')
-        return get_object_or_404(self.model, pk=id)
+        request = serializer_field.context['request']
+        id = request.parser_context.get('kwargs').get('id')
+        return get_request_object(request, self.model, id)
 
     def __repr__(self):
         return f'{self.__class__.__name__}'
@@ -0,0 +1,116 @@
+import csv
+import json
+
+from rest_framework import renderers
+
+from .generate_pdf import format_line, get_shopping_cart_pdf, get_title
+
+EXPORTERS = []
+CHUNK_SIZE = 64 * 1024
+
+
+def register_exporter(exporter):
+    '''Add shopping list exporter to the formats offered for download.'''
+    EXPORTERS.append(exporter)
+    return exporter
+
+
+def iterate(cart):
+    '''Iterate over queryset without caching its rows.'''
+    if hasattr(cart, 'iterator'):
+        return cart.iterator()
+    return iter(cart)
+
+
+class ShoppingListExporter(renderers.BaseRenderer):
+    '''Base renderer streaming the aggregated shopping list.'''
+
+    charset = 'utf-8'
+
+    def stream(self, get_cart, user):
+        '''Yield chunks of the exported list.'''
+        raise NotImplementedError('Exporters must implement stream()')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        user = renderer_context['request'].user
+        return b''.join(
+            chunk if isinstance(chunk, bytes) else chunk.encode(self.charset)
+            for chunk in self.stream(lambda: data, user)
+        )
+
+    @property
+    def content_type(self):
+        if self.charset is None:
+            return self.media_type
+        return f'{self.media_type}; charset={self.charset}'
+
+
+@register_exporter
+class PDFExporter(ShoppingListExporter):
+    '''Shopping list as PDF-file, rendered once per cart contents.'''
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def stream(self, get_cart, user):
+        pdf = get_shopping_cart_pdf(user, get_cart)
+        for start in range(0, len(pdf), CHUNK_SIZE):
+            yield pdf[start:start + CHUNK_SIZE]
+
+
+@register_exporter
+class TextExporter(ShoppingListExporter):
+    '''Shopping list as plain text, one ingredient per line.'''
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, get_cart, user):
+        yield f'{get_title(user)}\n'
+        for number, item in enumerate(iterate(get_cart()), start=1):
+            yield f'{format_line(number, item)}\n'
+
+
+class Echo:
+    '''File-like object returning what is written to it.'''
+
+    def write(self, value):
+        return value
+
+
+@register_exporter
+class CSVExporter(ShoppingListExporter):
+    '''Shopping list as CSV table.'''
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, get_cart, user):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in iterate(get_cart()):
+            yield writer.writerow((
+                item.get('name'),
+                item.get('measurement_unit'),
+                item.get('amount'),
+            ))
+
+
+@register_exporter
+class JSONExporter(ShoppingListExporter):
+    '''Shopping list as JSON array.'''
+
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, get_cart, user):
+        separator = '['
+        for item in iterate(get_cart()):
+            yield separator + json.dumps({
+                'name': item.get('name'),
+                'measurement_unit': item.get('measurement_unit'),
+                'amount': item.get('amount'),
+            }, ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
@@ -0,0 +1,59 @@
+import base64
+import binascii
+import mimetypes
+import tempfile
+import uuid
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+BASE64_HEADER = ';base64,'
+BASE64_CHUNK_SIZE = 64 * 1024
+
+
+class RecipeImageField(serializers.ImageField):
+    '''Image uploaded as a base64 string or a multipart file.
+
+    Base64 data is decoded chunk by chunk into a temporary file, so the
+    decoded image never sits in memory next to its text. The image is
+    represented by its URL, or inline as base64 data when the request
+    has "image=base64" query parameter.
+    '''
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = self.decode(data)
+        return super().to_internal_value(data)
+
+    def decode(self, data):
+        header, _, data = data.rpartition(BASE64_HEADER)
+        upload = UploadedFile(tempfile.TemporaryFile(), uuid.uuid4().hex,
+                              header.replace('data:', '') or None)
+        try:
+            for start in range(0, len(data), BASE64_CHUNK_SIZE):
+                upload.write(base64.b64decode(
+                    data[start:start + BASE64_CHUNK_SIZE], validate=True))
+            upload.size = upload.tell()
+            upload.seek(0)
+            with Image.open(upload) as image:
+                extension = EXTENSIONS[image.format]
+        except (binascii.Error, ValueError, OSError, KeyError):
+            upload.close()
+            self.fail('invalid_image')
+        upload.seek(0)
+        upload.name = f'{upload.name}.{extension}'
+        return upload
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        if (not value or request is None
+                or request.query_params.get('image') != 'base64'):
+            return super().to_representation(value)
+        with default_storage.open(value.name) as file:
+            data = base64.b64encode(file.read()).decode()
+        content_type = (mimetypes.guess_type(value.name)[0]
+                        or 'application/octet-stream')
+        return f'data:{content_type}{BASE64_HEADER}{data}'
@@ -1,14 +1,11 @@
+from django.db.models import F
 from django_filters import filters
 from django_filters.rest_framework.filters import BooleanFilter
 from django_filters.rest_framework.filterset import FilterSet
-from recipes.models import Recipe, Tag
-from rest_framework.filters import SearchFilter
+from recipes.models import Recipe
 
-
-class IngredientSearchFilter(SearchFilter):
-    '''Filter for Ingredient model with search parameter "name".'''
-
-    search_param = 'name'
+from .recipe_search import search_recipes
+from .tag_index import filter_by_tags, tag_index
 
 
 class RecipeFilter(FilterSet):
@@ -17,10 +14,14 @@ class RecipeFilter(FilterSet):
     is_favorited = BooleanFilter(method='filter_is_in')
     is_in_shopping_cart = BooleanFilter(method='filter_is_in')
     author = filters.NumberFilter(field_name='author__id')
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all())
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_index.get_choices, method='filter_tags')
+    tags_match = filters.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')), method='skip_filter')
+    search = filters.CharFilter(method='search_text')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'), ('trending', 'trending')),
+        method='order_by_score')
 
     class Meta:
         model = Recipe
@@ -36,3 +37,32 @@ class RecipeFilter(FilterSet):
                 return queryset.filter(cart_recipe__user=user)
             raise f'Неизвестный параметр {name}'
         return queryset
+
+    def filter_tags(self, queryset, name, value):
+        '''Recipes with any of the tags, or all of them if "tags_match=all".'''
+        return filter_by_tags(
+            queryset, value, self.form.cleaned_data.get('tags_match') or 'any')
+
+    def skip_filter(self, queryset, name, value):
+        '''Parameter read by another filter's method.'''
+        return queryset
+
+    def search_text(self, queryset, name, value):
+        '''Full-text search over name, description and ingredients.'''
+        return search_recipes(queryset, value)
+
+    def order_by_score(self, queryset, name, value):
+        '''Order by precomputed score, unscored recipes go last.'''
+        return order_by_score(queryset, value)
+
+
+SCORE_FIELDS = {
+    'popular': 'score__popularity',
+    'trending': 'score__trending',
+}
+
+
+def order_by_score(queryset, ordering):
+    return queryset.order_by(
+        F(SCORE_FIELDS[ordering]).desc(nulls_last=True), '-pk'
+    )
@@ -1,32 +1,103 @@
+import hashlib
+import io
+import json
 import os
+from functools import lru_cache
 
+from django.conf import settings
+from django.core.cache import cache
+from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
-from rest_framework.decorators import action
-
-
-@action(detail=False)
-def generate_pdf(self, response, cart):
-    '''Download shopping list as PDF-file.'''
-    pdfmetrics.registerFont(
-        TTFont('RadioVolna', (os.path.abspath('data/RadioVolna.ttf')))
-    )
-    pdf = canvas.Canvas(response)
-    pdf.setFont('RadioVolna', 25)
-    pdf.drawString(
-        150, 800, f'{self.request.user.first_name}, remember to buy:'
-    )
-    pdf.setFont('RadioVolna', 20)
-    pdf.translate(cm, 26.5 * cm)
-    for item in range(len(cart)):
-        pdf.drawString(
-            100, -item * cm,
-            (f"{item+1} {cart[item].get('ingredients__name')} - "
-             f"{cart[item].get('total')} "
-             f"{cart[item].get('ingredients__measurement_unit')};")
-        )
+
+FONT_NAME = 'RadioVolna'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data', 'RadioVolna.ttf')
+TITLE_FONT_SIZE = 25
+LINE_FONT_SIZE = 20
+LINE_HEIGHT = cm
+MARGIN = 2 * cm
+
+CART_KEY = 'shopping_cart:{user_id}'
+PDF_KEY = 'shopping_cart_pdf:{digest}'
+CACHE_TIMEOUT = getattr(settings, 'SHOPPING_CART_CACHE_TIMEOUT', 60 * 60)
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    '''Register the TTF font once per process.'''
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+    return FONT_NAME
+
+
+def get_title(user):
+    '''Heading of the user's shopping list.'''
+    return f'{user.first_name}, remember to buy:'
+
+
+def format_line(number, item):
+    '''Shopping list line for one aggregated ingredient.'''
+    return (f"{number} {item.get('name')} - "
+            f"{item.get('amount')} "
+            f"{item.get('measurement_unit')};")
+
+
+def render_pdf(title, cart):
+    '''Render shopping list flowing onto as many pages as needed.'''
+    font = register_font()
+    buffer = io.BytesIO()
+    width, height = A4
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setFont(font, TITLE_FONT_SIZE)
+    pdf.drawString(MARGIN, height - MARGIN, title)
+    y = height - MARGIN - 2 * LINE_HEIGHT
+    pdf.setFont(font, LINE_FONT_SIZE)
+    for number, item in enumerate(cart, start=1):
+        for line in simpleSplit(format_line(number, item), font,
+                                LINE_FONT_SIZE, width - 2 * MARGIN):
+            if y < MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, LINE_FONT_SIZE)
+                y = height - MARGIN
+            pdf.drawString(MARGIN, y, line)
+            y -= LINE_HEIGHT
     pdf.showPage()
     pdf.save()
-    return response
+    return buffer.getvalue()
+
+
+def get_digest(title, cart):
+    '''Hash of the shopping list contents.'''
+    contents = json.dumps([title, cart], ensure_ascii=False, default=str)
+    return hashlib.sha256(contents.encode()).hexdigest()
+
+
+def get_shopping_cart_pdf(user, get_cart):
+    '''PDF shopping list of the user, rendered only when the cart changed.
+
+    The user's key holds the digest of their last rendered cart, so an
+    unchanged cart is served without aggregating it again.
+    '''
+    cart_key = CART_KEY.format(user_id=user.pk)
+    digest = cache.get(cart_key)
+    if digest is not None:
+        pdf = cache.get(PDF_KEY.format(digest=digest))
+        if pdf is not None:
+            return pdf
+    title = get_title(user)
+    cart = list(get_cart())
+    digest = get_digest(title, cart)
+    pdf_key = PDF_KEY.format(digest=digest)
+    pdf = cache.get(pdf_key)
+    if pdf is None:
+        pdf = render_pdf(title, cart)
+        cache.set(pdf_key, pdf, CACHE_TIMEOUT)
+    cache.set(cart_key, digest, CACHE_TIMEOUT)
+    return pdf
+
+
+def invalidate_shopping_cart(user_ids):
+    '''Forget cached shopping lists of the given users.'''
+    cache.delete_many([CART_KEY.format(user_id=pk) for pk in user_ids])
@@ -0,0 +1,20 @@
+from django.shortcuts import get_object_or_404
+
+
+def get_identity_map(request):
+    '''Objects already loaded while handling the request.
+
+    The map lives on the Django request, so DRF request wrappers of the
+    same request share it and it is dropped with the request.
+    '''
+    request = getattr(request, '_request', request)
+    return request.__dict__.setdefault('identity_map', {})
+
+
+def get_request_object(request, model, pk):
+    '''Object by primary key, queried at most once per request, or 404.'''
+    identity_map = get_identity_map(request)
+    key = (model._meta.label_lower, str(pk))
+    if key not in identity_map:
+        identity_map[key] = get_object_or_404(model, pk=pk)
+    return identity_map[key]
@@ -0,0 +1,98 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+IMAGE_PATH = 'media/recipes/'
+RENDITIONS_PATH = 'media/recipes/renditions/'
+
+executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                              thread_name_prefix='images')
+
+
+def get_format():
+    image_format = settings.IMAGE_FORMAT.upper()
+    return image_format, EXTENSIONS[image_format]
+
+
+def prepare(image):
+    '''Rotate the image by its EXIF data and bring it to RGB(A).'''
+    image = ImageOps.exif_transpose(image)
+    has_alpha = (image.mode in ('RGBA', 'LA')
+                 or image.mode == 'P' and 'transparency' in image.info)
+    if has_alpha and get_format()[0] != 'JPEG':
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def encode(image, size):
+    '''Downscale the image to fit size and encode it.'''
+    image = image.copy()
+    image.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, get_format()[0], quality=settings.IMAGE_QUALITY,
+               optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def process_image(recipe_id):
+    '''Re-encode the recipe image and render its thumbnails.'''
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'image', 'image_renditions').first()
+    if recipe is None or not recipe['image']:
+        return
+    original = recipe['image']
+    stem = os.path.splitext(os.path.basename(original))[0]
+    extension = get_format()[1]
+    with default_storage.open(original) as file, Image.open(file) as image:
+        image = prepare(image)
+        max_size = (settings.IMAGE_MAX_SIZE, settings.IMAGE_MAX_SIZE)
+        name = default_storage.save(f'{IMAGE_PATH}{stem}.{extension}',
+                                    encode(image, max_size))
+        renditions = {
+            label: default_storage.save(
+                f'{RENDITIONS_PATH}{stem}_{label}.{extension}',
+                encode(image, size)
+            )
+            for label, size in settings.IMAGE_RENDITIONS.items()
+        }
+    renditions['source'] = name
+    if Recipe.objects.filter(pk=recipe_id, image=original).update(
+            image=name, image_renditions=renditions):
+        obsolete = {original, *recipe['image_renditions'].values()} - {name}
+    else:
+        obsolete = set(renditions.values())
+    for path in obsolete:
+        default_storage.delete(path)
+
+
+def run(recipe_id):
+    try:
+        process_image(recipe_id)
+    except Exception:
+        logger.exception('Processing image of recipe %s failed', recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_image_processing(recipe_id):
+    '''Process the recipe image in the worker pool after commit.'''
+    transaction.on_commit(lambda: executor.submit(run, recipe_id))
+
+
+def get_rendition_url(recipe, label):
+    '''Thumbnail URL, the original image until thumbnails are ready.'''
+    renditions = recipe.image_renditions
+    if label in renditions and renditions['source'] == recipe.image.name:
+        return default_storage.url(renditions[label])
+    return recipe.image.url if recipe.image else None
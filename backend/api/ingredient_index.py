@@ -0,0 +1,52 @@
+from bisect import bisect_left
+
+from recipes.models import Ingredient
+
+from .reference_data import get_version
+from .serializers import IngredientSerializer
+
+
+class IngredientIndex:
+    '''In-memory sorted array of ingredient names for autocomplete.
+
+    The index is rebuilt from the database whenever the version of
+    ingredients data changes, which happens on every save or delete.
+    '''
+
+    def __init__(self):
+        self._version = None
+        self._index = ((), ())
+
+    def build(self):
+        rows = sorted(
+            IngredientSerializer(Ingredient.objects.all(), many=True).data,
+            key=lambda row: (row['name'].lower(), row['id'])
+        )
+        return tuple(row['name'].lower() for row in rows), tuple(rows)
+
+    def get_index(self):
+        version = get_version(Ingredient)
+        if version != self._version:
+            self._index = self.build()
+            self._version = version
+        return self._index
+
+    def search(self, name, limit=None):
+        '''Ingredients starting with name, then the ones containing it.'''
+        query = name.lower()
+        keys, rows = self.get_index()
+        found = []
+        position = bisect_left(keys, query)
+        while position < len(keys) and keys[position].startswith(query):
+            found.append(rows[position])
+            position += 1
+        if limit is not None and len(found) >= limit:
+            return found[:limit]
+        found.extend(
+            row for key, row in zip(keys, rows)
+            if query in key and not key.startswith(query)
+        )
+        return found if limit is None else found[:limit]
+
+
+ingredient_index = IngredientIndex()
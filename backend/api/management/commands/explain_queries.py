@@ -0,0 +1,48 @@
+from api.query_plans import HOT_PATHS, explain, get_full_scans
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+
+
+class Command(BaseCommand):
+    '''Print query plans of the hot-path querysets.'''
+
+    help = ('Run EXPLAIN, or EXPLAIN ANALYZE with --analyze, on every '
+            'registered hot-path queryset. With --check exit with an error '
+            'when a plan reads a whole table that should be read by index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Execute the queries and print actual timings.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail on full scans of indexed tables. Sequential scans '
+                 'are turned off on PostgreSQL, so small tables pass too.'
+        )
+        parser.add_argument(
+            '--user', type=int,
+            help='Id of the user to build querysets for, by default the '
+                 'one with the longest shopping cart.'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('-shopping_cart_count', 'pk')
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to build querysets for.')
+        failures = []
+        for name, (factory, tables) in HOT_PATHS.items():
+            queryset = factory(user)
+            plan = explain(queryset, options['analyze'], options['check'])
+            self.stdout.write(f'== {name}\n{plan}\n')
+            if options['check']:
+                failures.extend(
+                    f'{name}: full scan of {table}'
+                    for table in sorted(get_full_scans(queryset, plan,
+                                                       tables))
+                )
+        if failures:
+            raise CommandError('\n'.join(failures))
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from api.exporters import EXPORTERS
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/tags/', '/api/ingredients/?name=%D0%BC', '/api/recipes/'
+)
+EXPORT_PATH = '/api/recipes/download_shopping_cart/?format={format}'
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    '''Measure throughput and latency of endpoints of a running server.'''
+
+    help = ('Send concurrent GET requests to a running server and print '
+            'requests per second and latency percentiles for every path, '
+            'e.g. to compare WSGI and ASGI deployments.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Base URL, e.g. http://localhost')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request, may be repeated. Tags, ingredient '
+                 'search and recipe list by default.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Number of requests per path.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=20,
+            help='Number of requests in flight.'
+        )
+        parser.add_argument(
+            '--token', help='Auth token to send with the requests.'
+        )
+        parser.add_argument(
+            '--exporters', action='store_true',
+            help='Also download the shopping list in every export format '
+                 'to compare their throughput, needs --token.'
+        )
+
+    def fetch(self, url, headers):
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers)) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except URLError:
+            status = None
+        return time.perf_counter() - start, status
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f"Token {options['token']}"
+        paths = list(options['paths'] or DEFAULT_PATHS)
+        if options['exporters']:
+            if not options['token']:
+                raise CommandError('Shopping list download needs --token.')
+            paths.extend(EXPORT_PATH.format(format=exporter.format)
+                         for exporter in EXPORTERS)
+        self.stdout.write(
+            f"{'path':50} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>6}"
+        )
+        for path in paths:
+            url = options['url'].rstrip('/') + path
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                start = time.perf_counter()
+                results = list(executor.map(
+                    lambda _: self.fetch(url, headers),
+                    range(options['requests'])
+                ))
+                elapsed = time.perf_counter() - start
+            latencies = sorted(latency * 1000 for latency, _ in results)
+            errors = sum(status is None or status >= 400
+                         for _, status in results)
+            self.stdout.write(
+                f'{path:50} {len(results) / elapsed:8.1f} '
+                f'{percentile(latencies, 0.5):8.1f} '
+                f'{percentile(latencies, 0.95):8.1f} '
+                f'{percentile(latencies, 0.99):8.1f} {errors:6}'
+            )
@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from api.profiling import clear_samples, get_samples
+from django.core.management.base import BaseCommand
+
+COLUMNS = ('queries', 'duplicates', 'db_time', 'pool_wait',
+           'serializer_time', 'total_time', 'size')
+
+
+class Command(BaseCommand):
+    '''Print the slowest endpoints from profiling samples.'''
+
+    help = ('Print endpoints with the highest average cost from samples '
+            'collected by QueryProfilingMiddleware in "profiling" cache, '
+            'which is shared between processes through files by default.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=COLUMNS, default='total_time',
+            help='Average to rank endpoints by, total_time by default.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Number of endpoints to print.'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Empty the ring buffer after printing the report.'
+        )
+
+    def handle(self, *args, **options):
+        samples = get_samples()
+        if not samples:
+            self.stdout.write('No profiling samples collected.')
+            return
+        by_view = defaultdict(list)
+        for sample in samples:
+            by_view[sample['view']].append(sample)
+        rows = []
+        for view, view_samples in by_view.items():
+            row = {'view': view, 'hits': len(view_samples)}
+            for column in COLUMNS:
+                values = [sample.get(column) for sample in view_samples
+                          if sample.get(column) is not None]
+                row[column] = (sum(values) / len(values)) if values else 0
+            row['max_queries'] = max(
+                sample['queries'] for sample in view_samples)
+            rows.append(row)
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+        self.stdout.write(
+            f"{'hits':>6} {'queries':>8} {'max':>5} {'dup':>5} "
+            f"{'db ms':>8} {'wait ms':>8} {'ser ms':>8} {'total ms':>9} "
+            f"{'bytes':>9}  view"
+        )
+        for row in rows[:options['limit']]:
+            self.stdout.write(
+                f"{row['hits']:>6} {row['queries']:>8.1f} "
+                f"{row['max_queries']:>5} {row['duplicates']:>5.1f} "
+                f"{row['db_time']:>8.2f} {row['pool_wait']:>8.2f} "
+                f"{row['serializer_time']:>8.2f} "
+                f"{row['total_time']:>9.2f} {row['size']:>9.0f}  "
+                f"{row['view']}"
+            )
+        if options['clear']:
+            clear_samples()
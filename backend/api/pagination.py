@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageLimitPagination(PageNumberPagination):
+    '''Page number pagination with page size set by "limit" parameter.'''
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class KeysetPagination(PageLimitPagination):
+    '''Page number pagination switching to keyset mode with "cursor".
+
+    Next links carry the key of the last object on the page, so clients
+    following them fetch each page with an indexed "key < cursor" filter
+    instead of OFFSET. Count in keyset mode is exact, capped or skipped
+    according to KEYSET_PAGINATION_COUNT setting. The view names the key
+    attribute in "keyset_field", the queryset must be ordered by it
+    descending. Views with "keyset_field" set to None paginate by page
+    number only.
+    '''
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset_field = getattr(view, 'keyset_field', 'pk')
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        if self.keyset_field is None:
+            self.cursor = None
+        if self.cursor is None:
+            page = super().paginate_queryset(queryset, request, view)
+            self.last_key = self.get_last_key(page)
+            return page
+        try:
+            self.cursor = int(self.cursor)
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 2))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset)
+        page = list(queryset.filter(
+            **{f'{self.keyset_field}__lt': self.cursor}
+        )[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.last_key = self.get_last_key(page)
+        return page
+
+    def get_last_key(self, page):
+        if not page or self.keyset_field is None:
+            return None
+        return getattr(page[-1], self.keyset_field)
+
+    def get_count(self, queryset):
+        mode = settings.KEYSET_PAGINATION_COUNT
+        if mode == 'none':
+            return None
+        if mode == 'approximate':
+            limit = settings.KEYSET_PAGINATION_COUNT_LIMIT
+            return queryset.values('pk')[:limit].count()
+        return queryset.count()
+
+    def get_paginated_response(self, data):
+        if self.cursor is None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if self.cursor is None:
+            url = super().get_next_link()
+        elif self.has_next:
+            url = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.page_query_param, self.page_number + 1)
+        else:
+            url = None
+        if url is None or self.last_key is None:
+            return url
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.last_key)
+
+    def get_previous_link(self):
+        if self.cursor is None:
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(),
+                                 self.cursor_query_param)
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.page_number - 1)
@@ -0,0 +1,117 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from recipes.models import RecipeIngredient
+
+SEQUENCE_KEY = 'recipe_ingredients_sequence'
+CHANGE_KEY = 'recipe_ingredients_change:{number}'
+CHANGE_LOG_SIZE = getattr(settings, 'PANTRY_CHANGE_LOG_SIZE', 1000)
+
+
+def get_sequence():
+    '''Number of the last recorded change of recipe ingredients.'''
+    sequence = cache.get(SEQUENCE_KEY)
+    if sequence is None:
+        cache.add(SEQUENCE_KEY, 0, None)
+        return cache.get(SEQUENCE_KEY, 0)
+    return sequence
+
+
+def record_change(recipe_id):
+    '''Log the recipe so that every worker updates its index.'''
+    get_sequence()
+    number = cache.incr(SEQUENCE_KEY)
+    cache.set(CHANGE_KEY.format(number=number), recipe_id, None)
+    cache.delete(CHANGE_KEY.format(number=number - CHANGE_LOG_SIZE))
+
+
+def remove(ids, value):
+    position = bisect_left(ids, value)
+    if position < len(ids) and ids[position] == value:
+        del ids[position]
+
+
+class PantryIndex:
+    '''In-memory inverted index of recipes by ingredient.
+
+    Each ingredient keeps a sorted array of ids of recipes using it. Every
+    worker replays the shared log of changed recipes and reloads only
+    them, the whole index is rebuilt when the worker falls too far behind.
+    '''
+
+    def __init__(self):
+        self._sequence = None
+        self._recipes = {}
+        self._ingredients = {}
+
+    def build(self):
+        recipes = defaultdict(lambda: array('l'))
+        ingredients = defaultdict(list)
+        for ingredient_id, recipe_id in RecipeIngredient.objects.values_list(
+                'ingredient_id', 'recipe_id').order_by(
+                    'ingredient_id', 'recipe_id').iterator():
+            ids = recipes[ingredient_id]
+            if not ids or ids[-1] != recipe_id:
+                ids.append(recipe_id)
+                ingredients[recipe_id].append(ingredient_id)
+        self._recipes = dict(recipes)
+        self._ingredients = {
+            recipe_id: tuple(ids) for recipe_id, ids in ingredients.items()
+        }
+
+    def update(self, recipe_ids):
+        '''Reload ingredients of the given recipes only.'''
+        ingredients = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids).values_list(
+                    'recipe_id', 'ingredient_id'):
+            ingredients[recipe_id].add(ingredient_id)
+        for recipe_id in recipe_ids:
+            for ingredient_id in self._ingredients.pop(recipe_id, ()):
+                remove(self._recipes[ingredient_id], recipe_id)
+            for ingredient_id in ingredients.get(recipe_id, ()):
+                insort(self._recipes.setdefault(ingredient_id, array('l')),
+                       recipe_id)
+            if recipe_id in ingredients:
+                self._ingredients[recipe_id] = tuple(ingredients[recipe_id])
+
+    def refresh(self):
+        sequence = get_sequence()
+        if sequence == self._sequence:
+            return
+        if (self._sequence is None or sequence < self._sequence
+                or sequence - self._sequence >= CHANGE_LOG_SIZE):
+            self.build()
+        else:
+            keys = [CHANGE_KEY.format(number=number)
+                    for number in range(self._sequence + 1, sequence + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) < len(keys):
+                self.build()
+            else:
+                self.update(set(changes.values()))
+        self._sequence = sequence
+
+    def match(self, ingredient_ids, min_coverage=0):
+        '''Recipes ranked by the share of their ingredients available.
+
+        Returns tuples of recipe id, number of available ingredients and
+        number of all ingredients of the recipe.
+        '''
+        self.refresh()
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self._recipes.get(ingredient_id, ()))
+        found = [
+            (recipe_id, count, len(self._ingredients[recipe_id]))
+            for recipe_id, count in matched.items()
+        ]
+        found = [row for row in found if row[1] / row[2] >= min_coverage]
+        found.sort(key=lambda row: (-row[1] / row[2], -row[1], -row[0]))
+        return found
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,163 @@
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+CACHE_ALIAS = 'profiling'
+SAMPLE_KEY = 'profiling:sample:{slot}'
+COUNTER_KEY = 'profiling:counter'
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+class Profile:
+    '''Costs of one request: SQL queries, serialization and response.'''
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries.append(sql)
+
+    @property
+    def duplicates(self):
+        '''Queries repeating an earlier SQL statement, a sign of N+1.'''
+        return sum(
+            count - 1 for count in Counter(self.queries).values() if count > 1
+        )
+
+
+def timed_data(data):
+    '''Wrap serializer "data" property to add its time to the profile.'''
+
+    def wrapper(serializer):
+        profile = current_profile.get()
+        if profile is None or profile.serializer_depth:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile.serializer_depth -= 1
+
+    wrapper.profiled = True
+    return property(wrapper)
+
+
+def instrument_serializers():
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        data = serializer_class.__dict__['data']
+        if not getattr(data.fget, 'profiled', False):
+            serializer_class.data = timed_data(data)
+
+
+def get_samples():
+    '''Samples currently held in the ring buffer.'''
+    size = settings.PROFILING['BUFFER_SIZE']
+    return list(caches[CACHE_ALIAS].get_many(
+        [SAMPLE_KEY.format(slot=slot) for slot in range(size)]
+    ).values())
+
+
+def clear_samples():
+    size = settings.PROFILING['BUFFER_SIZE']
+    caches[CACHE_ALIAS].delete_many(
+        [SAMPLE_KEY.format(slot=slot) for slot in range(size)]
+        + [COUNTER_KEY]
+    )
+
+
+def store_sample(sample):
+    '''Write sample into the next slot of the ring buffer in the cache.'''
+    cache = caches[CACHE_ALIAS]
+    cache.add(COUNTER_KEY, 0, None)
+    try:
+        number = cache.incr(COUNTER_KEY)
+    except ValueError:
+        number = 0
+    slot = number % settings.PROFILING['BUFFER_SIZE']
+    cache.set(SAMPLE_KEY.format(slot=slot), sample, None)
+
+
+class QueryProfilingMiddleware:
+    '''Measure SQL queries, serializer time and response size per view.
+
+    Sampled requests are stored in a ring buffer in "profiling" cache, which
+    "profiling_report" command reads, and optionally reported in X-Profile
+    response headers. Disabled by PROFILING['ENABLED'] setting, in which
+    case Django drops the middleware altogether.
+    '''
+
+    def __init__(self, get_response):
+        if not settings.PROFILING['ENABLED']:
+            raise MiddlewareNotUsed
+        instrument_serializers()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING['SAMPLE_RATE']:
+            return self.get_response(request)
+        profile = Profile()
+        token = current_profile.set(profile)
+        pool_wait = self.get_pool_wait()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total_time = time.perf_counter() - start
+        sample = {
+            'view': self.get_view_name(request),
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'duplicates': profile.duplicates,
+            'db_time': round(profile.db_time * 1000, 2),
+            'serializer_time': round(profile.serializer_time * 1000, 2),
+            'total_time': round(total_time * 1000, 2),
+            'pool_wait': round(
+                (self.get_pool_wait() - pool_wait) * 1000, 2),
+            'size': (None if response.streaming
+                     else len(response.content)),
+        }
+        store_sample(sample)
+        if settings.PROFILING['HEADERS']:
+            for name in ('queries', 'duplicates', 'db_time',
+                         'serializer_time', 'total_time'):
+                header = name.replace('_', '-').title()
+                response[f'X-Profile-{header}'] = str(sample[name])
+        return response
+
+    @staticmethod
+    def get_pool_wait():
+        '''Seconds this thread has waited for pooled connections so far.'''
+        return sum(getattr(connections[alias], 'pool_wait', 0.0)
+                   for alias in connections)
+
+    @staticmethod
+    def get_view_name(request):
+        match = request.resolver_match
+        if match is None:
+            return f'{request.method} {request.path_info}'
+        return f'{request.method} {match.view_name or match.route}'
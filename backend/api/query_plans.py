@@ -0,0 +1,102 @@
+import re
+
+from django.db import connections, transaction
+from django.http import HttpRequest
+from recipes.models import Recipe, RecipeIngredient, Tag
+from rest_framework.request import Request
+
+from .cart_totals import get_cart_totals
+from .tag_index import filter_by_tags
+from .views import RecipeViewSet, SubscriptionViewSet
+
+HOT_PATHS = {}
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+
+
+def register_hot_path(name, tables):
+    '''Add queryset to the ones checked by "explain_queries" command.
+
+    The factory gets a sample user and returns the queryset, which must
+    not scan the whole of any of the given tables.
+    '''
+
+    def decorator(factory):
+        HOT_PATHS[name] = (factory, tables)
+        return factory
+
+    return decorator
+
+
+def get_view(viewset, user):
+    '''Viewset handling a GET request of the user, to build querysets.'''
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    request = Request(http_request)
+    request.user = user
+    return viewset(request=request, format_kwarg=None, kwargs={},
+                   action='list')
+
+
+def explain(queryset, analyze=False, check=False):
+    '''Query plan of the queryset, with sequential scans off to check.'''
+    connection = connections[queryset.db]
+    with transaction.atomic(using=queryset.db):
+        if check and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        options = {'analyze': True} if analyze else {}
+        return queryset.explain(**options)
+
+
+def get_full_scans(queryset, plan, tables):
+    '''Tables from the list read whole according to the plan.'''
+    pattern = FULL_SCAN_PATTERNS.get(connections[queryset.db].vendor)
+    if pattern is None:
+        return set()
+    return {
+        table for line in plan.splitlines()
+        for table in pattern.findall(line) if table in tables
+    }
+
+
+@register_hot_path('recipes by tag', tables=('recipes_recipetag',))
+def recipes_by_tag(user):
+    tag = Tag.objects.first()
+    return filter_by_tags(
+        Recipe.objects.all(), [getattr(tag, 'slug', '')])[:6]
+
+
+@register_hot_path('recipes by author', tables=('recipes_recipe',))
+def recipes_by_author(user):
+    return Recipe.objects.filter(author=user).order_by('-pk')[:6]
+
+
+@register_hot_path('recipe page', tables=(
+    'recipes_favorite', 'recipes_shoppingcart'))
+def recipe_page(user):
+    return get_view(RecipeViewSet, user).get_queryset()[:6]
+
+
+@register_hot_path('recipe ingredients', tables=('recipes_recipeingredient',))
+def recipe_ingredients(user):
+    return RecipeIngredient.objects.filter(
+        recipe__in=Recipe.objects.values('pk')[:6]
+    ).select_related('ingredient')
+
+
+@register_hot_path('favorites of user', tables=('recipes_favorite',))
+def favorites(user):
+    return Recipe.objects.filter(recipe_favorite__user=user)
+
+
+@register_hot_path('shopping cart', tables=('recipes_shoppingcarttotal',))
+def shopping_cart(user):
+    return get_cart_totals(user)
+
+
+@register_hot_path('subscriptions', tables=('users_subscription',))
+def subscriptions(user):
+    return get_view(SubscriptionViewSet, user).get_queryset()[:6]
@@ -0,0 +1,114 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Case, F, OuterRef, Subquery, When
+from recipes.models import Recipe, RecipeIngredient
+
+from .reference_data import get_version
+
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def update_search_vectors(queryset):
+    '''Recompute search vectors of recipes from name, text, ingredients.'''
+    if connection.vendor != 'postgresql':
+        return
+    config = settings.SEARCH_CONFIG
+    ingredients = Subquery(
+        RecipeIngredient.objects.filter(recipe=OuterRef('pk')).order_by()
+        .values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+    )
+    queryset.update(search_vector=(
+        SearchVector('name', weight='A', config=config)
+        + SearchVector(ingredients, weight='B', config=config)
+        + SearchVector('text', weight='C', config=config)
+    ))
+
+
+class RecipeSearchIndex:
+    '''In-memory inverted index of recipe words for databases without FTS.
+
+    Words are kept in a sorted array, so every query word also matches
+    longer words starting with it. The index is rebuilt when the version
+    of recipes data changes.
+    '''
+
+    def __init__(self):
+        self._version = None
+        self._index = ((), ())
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(int))
+        for pk, name, text in Recipe.objects.values_list(
+                'pk', 'name', 'text').iterator():
+            for word in tokenize(name):
+                postings[word][pk] += NAME_WEIGHT
+            for word in tokenize(text):
+                postings[word][pk] += TEXT_WEIGHT
+        for pk, name in RecipeIngredient.objects.values_list(
+                'recipe_id', 'ingredient__name').iterator():
+            for word in tokenize(name):
+                postings[word][pk] += INGREDIENT_WEIGHT
+        words = sorted(postings)
+        return tuple(words), tuple(dict(postings[word]) for word in words)
+
+    def get_index(self):
+        version = get_version(Recipe)
+        if version != self._version:
+            self._index = self.build()
+            self._version = version
+        return self._index
+
+    def search(self, value):
+        '''Ids of recipes matching every word, best matches first.'''
+        words, postings = self.get_index()
+        scores = None
+        for query_word in tokenize(value):
+            word_scores = defaultdict(int)
+            position = bisect_left(words, query_word)
+            while (position < len(words)
+                   and words[position].startswith(query_word)):
+                for pk, weight in postings[position].items():
+                    word_scores[pk] += weight
+                position += 1
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pk: score + word_scores[pk]
+                          for pk, score in scores.items()
+                          if pk in word_scores}
+        if not scores:
+            return []
+        return sorted(scores, key=lambda pk: (-scores[pk], -pk))
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, value):
+    '''Filter recipes by text and order them by relevance.'''
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(value, config=settings.SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pk')
+    ids = recipe_search_index.search(value)[:settings.SEARCH_RESULTS_LIMIT]
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+        default=len(ids)
+    ))
@@ -0,0 +1,32 @@
+import uuid
+
+from django.core.cache import cache
+
+VERSION_KEY = 'reference_data_version:{label}'
+DATA_KEY = 'reference_data:{etag}:{path}'
+
+
+def get_version(model):
+    '''Current version of the model's data, shared by all workers.'''
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        return cache.get(key)
+    return version
+
+
+def bump_version(model):
+    '''Mark everything cached for the model as outdated.'''
+    cache.set(VERSION_KEY.format(label=model._meta.label_lower),
+              uuid.uuid4().hex, None)
+
+
+def get_etag(model):
+    '''Strong ETag of the model's data in its current version.'''
+    return f'"{model._meta.model_name}-{get_version(model)}"'
+
+
+def get_data_key(etag, request):
+    '''Cache key of a response with the data of the given version.'''
+    return DATA_KEY.format(etag=etag, path=request.get_full_path())
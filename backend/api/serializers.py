@@ -1,5 +1,7 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser import serializers as djoser_serializers
-from drf_extra_fields.fields import Base64ImageField
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             RecipeTag, ShoppingCart, Tag)
 from rest_framework import serializers, validators
@@ -8,7 +10,9 @@ from users.models import Subscription, User
 
 from .base_serializers import (BaseSubscribeSerializer,
                                BaseUserRecipeSerializer,
-                               EmbeddedRecipeSerializer)
+                               EmbeddedRecipeSerializer, ThumbnailsField)
+from .cart_totals import change_cart_totals, get_cart_users
+from .fields import RecipeImageField
 from .validators import check_for_duplicates
 
 
@@ -32,6 +36,8 @@ class UserSerializer(djoser_serializers.UserSerializer):
                   'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return (self.context['request'].user.is_authenticated
                 and Subscription.objects.filter(
                 user=self.context['request'].user, author=obj
@@ -76,16 +82,10 @@ class SubscribeSerializer(BaseSubscribeSerializer):
         request = self.context['request']
         if request.method == 'POST' and request.user == data['author']:
             raise ValidationError('You can not subscribe to yourself')
-        if request.method == 'DELETE' and not Subscription.objects.get(
-            user=request.user,
-            id=request.parser_context.get('kwargs').get('id')
-        ):
-            raise ValidationError(
-                'You cannot unsubscribe from someone you are not subscribed to'
-            )
         return data
 
     def to_representation(self, instance):
+        instance.author.is_subscribed = True
         return SubscriptionSerializer(
             instance.author,
             context={
@@ -94,16 +94,15 @@ class SubscribeSerializer(BaseSubscribeSerializer):
         ).data
 
     def create(self, validated_data):
-        user = validated_data.get('user')
-        id = validated_data.get('id')
-        return Subscription.objects.create(user=user, author=id)
+        return Subscription.objects.create(
+            user=validated_data['user'], author=validated_data['author'])
 
 
 class SubscriptionSerializer(UserSerializer):
     '''Serializer for getting Subscriprion objects' data.'''
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -112,19 +111,24 @@ class SubscriptionSerializer(UserSerializer):
             'is_subscribed', 'recipes', 'recipes_count'
         )
 
-    def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj)
-        serializer = EmbeddedRecipeSerializer(recipes, many=True)
+    @staticmethod
+    def get_recipes_limit(request):
+        '''Parse "recipes_limit" query parameter, None if absent or invalid.'''
         try:
-            recipes_limit = int(
-                self.context['request'].query_params.get('recipes_limit')
-            )
-            return serializer.data[:recipes_limit]
-        except TypeError:
-            return serializer.data
+            recipes_limit = int(request.query_params.get('recipes_limit'))
+        except (TypeError, ValueError):
+            return None
+        return recipes_limit if recipes_limit >= 0 else None
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+    def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            recipes = Recipe.objects.filter(author=obj)
+            recipes_limit = self.get_recipes_limit(self.context['request'])
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
+        return EmbeddedRecipeSerializer(recipes, many=True).data
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -156,7 +160,7 @@ class RecipeTagsSerializer(serializers.ModelSerializer):
 class WriteRecipeIngredientsSerializer(serializers.ModelSerializer):
     '''Serializer for RecipeIngredient model, write allowed.'''
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         fields = ('id', 'amount')
@@ -180,14 +184,12 @@ class GetRecipeIngredientSerializer(serializers.ModelSerializer):
 class WriteRecipeSerializer(serializers.ModelSerializer):
     '''Serializer for Recipe model, write allowed.'''
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     author = UserSerializer(
         read_only=True, default=serializers.CurrentUserDefault()
     )
     ingredients = WriteRecipeIngredientsSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         fields = (
@@ -196,53 +198,99 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
         )
         model = Recipe
 
+    def validate_image(self, value):
+        if value.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            raise ValidationError(
+                f'Image should not exceed '
+                f'{settings.IMAGE_MAX_UPLOAD_SIZE} bytes'
+            )
+        return value
+
     def validate_tags(self, value):
-        for tag in value:
-            if not Tag.objects.filter(id=tag.id).exists():
-                raise ValidationError('Tag does not exist')
         if check_for_duplicates(value):
             raise ValidationError('Tags shoud not be repeated')
-        return value
+        tags = Tag.objects.in_bulk(value)
+        if len(tags) != len(value):
+            raise ValidationError('Tag does not exist')
+        return [tags[pk] for pk in value]
 
     def validate_ingredients(self, value):
-        for ingredient in value:
-            if not Ingredient.objects.filter(id=ingredient['id'].id).exists():
-                raise ValidationError('Ingredient does not exist')
-        if check_for_duplicates(value):
+        ids = [ingredient['id'] for ingredient in value]
+        if check_for_duplicates(ids):
             raise ValidationError('Ingredients should not be repeated')
+        if Ingredient.objects.filter(pk__in=ids).count() != len(ids):
+            raise ValidationError('Ingredient does not exist')
         return value
 
+    def set_ingredients(self, recipe, ingredients):
+        '''Diff recipe ingredients against the new ones and write in bulk.'''
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        to_delete = []
+        to_update = []
+        deltas = {}
+        for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe):
+            pk = recipe_ingredient.ingredient_id
+            amount = amounts.pop(pk, None)
+            if amount is None:
+                to_delete.append(recipe_ingredient.pk)
+                deltas[pk] = -recipe_ingredient.amount
+            elif amount != recipe_ingredient.amount:
+                deltas[pk] = amount - recipe_ingredient.amount
+                recipe_ingredient.amount = amount
+                to_update.append(recipe_ingredient)
+        if to_delete:
+            RecipeIngredient.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in amounts.items()
+        )
+        deltas.update(amounts)
+        change_cart_totals(get_cart_users(recipe), deltas)
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            RecipeTag.objects.create(recipe=recipe, tag=tag)
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(recipe=recipe,
-                                            ingredient=ingredient['id'],
-                                            amount=ingredient['amount'])
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag) for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe,
+                             ingredient_id=ingredient['id'],
+                             amount=ingredient['amount'])
+            for ingredient in ingredients
+        )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        m2m_fields = ('tags', 'ingredients')
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
         for attr, value in validated_data.items():
-            if attr not in m2m_fields:
-                setattr(instance, attr, value)
+            setattr(instance, attr, value)
         instance.save()
-        instance.tags.set(validated_data.get('tags'))
-        get_ingredients = validated_data.pop('ingredients')
-        post_ingredients = []
-        for ingredient in get_ingredients:
-            recipe_ingredient = RecipeIngredient.objects.get_or_create(
-                recipe=instance,
-                ingredient=ingredient['id'],
-                amount=ingredient['amount'])
-            post_ingredients.append(recipe_ingredient[0].ingredient)
-        instance.ingredients.set(post_ingredients)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            self.set_ingredients(instance, ingredients)
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            (instance,),
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
         return GetRecipeSerializer(
             instance,
             context={
@@ -259,12 +307,14 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
-    image = Base64ImageField(read_only=True)
+    image = RecipeImageField(read_only=True)
+    thumbnails = ThumbnailsField()
 
     class Meta:
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+            'is_in_shopping_cart', 'name', 'image', 'thumbnails', 'text',
+            'cooking_time'
         )
         model = Recipe
 
@@ -273,24 +323,53 @@ class GetRecipeSerializer(serializers.ModelSerializer):
             obj.recipe_ingredient.all(), many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return (self.context['request'].user.is_authenticated
                 and Favorite.objects.filter(
                 user=self.context['request'].user, recipe=obj
                 ).exists())
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return (self.context['request'].user.is_authenticated
                 and ShoppingCart.objects.filter(
                 user=self.context['request'].user, recipe=obj
                 ).exists())
 
 
+class CookableRecipeSerializer(GetRecipeSerializer):
+    '''Recipe with the share of its ingredients the user has.'''
+
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(GetRecipeSerializer.Meta):
+        fields = GetRecipeSerializer.Meta.fields + ('coverage',)
+
+
+class PantrySerializer(serializers.Serializer):
+    '''Query parameters of recipes matching by ingredients.'''
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False)
+    min_coverage = serializers.FloatField(
+        min_value=0, max_value=1, default=0)
+
+
 class FavoriteSerializer(BaseUserRecipeSerializer):
     '''Serializer for Favorite model.'''
 
     class Meta:
         fields = ('user', 'id')
         model = Favorite
+        validators = (
+            validators.UniqueTogetherValidator(
+                queryset=Favorite.objects.all(),
+                fields=('user', 'id'),
+                message='Recipe is already in favorites'
+            ),
+        )
 
 
 class ShoppingCartSerializer(BaseUserRecipeSerializer):
@@ -299,3 +378,18 @@ class ShoppingCartSerializer(BaseUserRecipeSerializer):
     class Meta:
         fields = ('user', 'id')
         model = ShoppingCart
+        validators = (
+            validators.UniqueTogetherValidator(
+                queryset=ShoppingCart.objects.all(),
+                fields=('user', 'id'),
+                message='Recipe is already in shopping list'
+            ),
+        )
+
+
+class ShoppingCartTotalSerializer(serializers.Serializer):
+    '''Total amount of one ingredient in the shopping list.'''
+
+    name = serializers.CharField()
+    measurement_unit = serializers.CharField()
+    amount = serializers.ReadOnlyField()
@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+                            ShoppingCartTotal, Tag)
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .authentication import invalidate_tokens
+from .generate_pdf import invalidate_shopping_cart
+from .pantry_index import record_change
+from .recipe_search import update_search_vectors
+from .reference_data import bump_version
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    '''Reset cached shopping list when recipes are added or removed.'''
+    invalidate_shopping_cart((instance.user_id,))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    '''Reset cached shopping lists containing the edited recipe.'''
+    if not created:
+        invalidate_shopping_cart(
+            instance.cart_recipe.values_list('user_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+def cart_ingredient_changed(sender, instance, created, **kwargs):
+    '''Reset cached shopping lists with the renamed ingredient.'''
+    if not created:
+        invalidate_shopping_cart(
+            ShoppingCartTotal.objects.filter(
+                ingredient=instance).values_list('user_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=User)
+def cart_user_changed(sender, instance, created, **kwargs):
+    '''Reset the cached shopping list titled with the user's name.'''
+    if not created:
+        invalidate_shopping_cart((instance.pk,))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def reference_data_changed(sender, instance, **kwargs):
+    '''Outdate cached tags or ingredients and the autocomplete index.'''
+    bump_version(sender)
+
+
+class RecipeBatch:
+    '''Ids of recipes changed in a transaction, handled on commit.'''
+
+    def __init__(self, handler, recipe_id):
+        self.handler = handler
+        self.recipe_ids = {recipe_id}
+
+    def __call__(self):
+        self.handler(self.recipe_ids)
+
+
+def on_commit_once(handler, recipe_id):
+    '''Call the handler with changed recipes once the transaction commits.
+
+    Rows of one recipe, like its ingredients deleted with it, add their
+    recipe to the batch already waiting for the commit.
+    '''
+    connection = transaction.get_connection()
+    for _, func in connection.run_on_commit:
+        if isinstance(func, RecipeBatch) and func.handler is handler:
+            func.recipe_ids.add(recipe_id)
+            return
+    transaction.on_commit(RecipeBatch(handler, recipe_id))
+
+
+def reindex_recipes(queryset):
+    '''Update search vectors and outdate the in-memory search index.'''
+    update_search_vectors(queryset)
+    bump_version(Recipe)
+
+
+def reindex_recipe_ids(recipe_ids):
+    reindex_recipes(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_text_changed(sender, instance, **kwargs):
+    '''Reindex the recipe for search once it is committed.'''
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    on_commit_once(reindex_recipe_ids, recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, **kwargs):
+    '''Reindex recipes with the ingredient, its name may have changed.'''
+    if not created:
+        transaction.on_commit(lambda: reindex_recipes(
+            Recipe.objects.filter(recipe_ingredient__ingredient=instance)))
+
+
+def record_changes(recipe_ids):
+    for recipe_id in recipe_ids:
+        record_change(recipe_id)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    '''Update ingredient index of the recipe once it is committed.'''
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    on_commit_once(record_changes, recipe_id)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    '''Stop accepting the cached token after logout.'''
+    invalidate_tokens((instance.key,))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    '''Drop cached tokens with outdated user, e.g. deactivated one.'''
+    if not created:
+        invalidate_tokens(
+            Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
@@ -0,0 +1,51 @@
+from django.db.models import Count, Exists, OuterRef
+from recipes.models import RecipeTag, Tag
+
+from .reference_data import get_version
+
+
+class TagIndex:
+    '''In-memory map of tag slugs to ids.
+
+    The map is rebuilt from the database whenever the version of tags
+    data changes, which happens on every save or delete.
+    '''
+
+    def __init__(self):
+        self._version = None
+        self._slugs = {}
+
+    def get_slugs(self):
+        version = get_version(Tag)
+        if version != self._version:
+            self._slugs = dict(Tag.objects.values_list('slug', 'pk'))
+            self._version = version
+        return self._slugs
+
+    def get_choices(self):
+        return [(slug, slug) for slug in self.get_slugs()]
+
+    def get_ids(self, slugs):
+        known = self.get_slugs()
+        return {known[slug] for slug in slugs if slug in known}
+
+
+tag_index = TagIndex()
+
+
+def filter_by_tags(queryset, slugs, match='any'):
+    '''Recipes with any or all of the tags, each recipe only once.
+
+    Tags are matched in an EXISTS subquery on "recipe_tag" instead of a
+    join, so neither duplicate rows nor DISTINCT over the page appear.
+    '''
+    tag_ids = tag_index.get_ids(slugs)
+    if not tag_ids:
+        return queryset.none()
+    recipe_tags = RecipeTag.objects.filter(
+        recipe=OuterRef('pk'), tag__in=tag_ids)
+    if match == 'all' and len(tag_ids) > 1:
+        recipe_tags = recipe_tags.values('recipe').annotate(
+            tags_count=Count('tag', distinct=True)
+        ).filter(tags_count=len(tag_ids))
+    return queryset.filter(Exists(recipe_tags))
@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+from .authentication import local_tokens
+from .query_plans import explain, get_full_scans
+
+RECIPES_COUNT = 12
+RECIPE_LIST_QUERY_BUDGET = 6
+FAVORITE_QUERIES = 6
+SHOPPING_CART_QUERIES = 12
+SUBSCRIBE_QUERIES = 7
+DUPLICATE_QUERIES = 2
+
+
+class FoodgramTestCase(TestCase):
+    '''Authors with tagged recipes and an authenticated API client.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@foodgram.io',
+            password='author-password', first_name='Author')
+        cls.user = User.objects.create_user(
+            username='user', email='user@foodgram.io',
+            password='user-password', first_name='User')
+        cls.tags = [
+            Tag.objects.create(name=f'tag {number}', color=f'#00000{number}',
+                               slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'ingredient {number}',
+                                      measurement_unit='г')
+            for number in range(5)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'recipe {number}',
+                text='description', cooking_time=10,
+                image='media/recipes/recipe.png')
+            for number in range(RECIPES_COUNT)
+        ]
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in cls.recipes for tag in cls.tags[:2]
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for recipe in cls.recipes for ingredient in cls.ingredients[:3]
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.tokens.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def count_queries(self, method, url, **kwargs):
+        '''Response and number of queries it took.'''
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(queries)
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    '''Recipe pages take the same number of queries whatever their size.'''
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.client.get('/api/recipes/')
+        response, small_page = self.count_queries(
+            'get', '/api/recipes/?limit=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertLessEqual(small_page, RECIPE_LIST_QUERY_BUDGET)
+        with self.assertNumQueries(small_page):
+            response = self.client.get('/api/recipes/?limit=10')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_anonymous_query_count_does_not_depend_on_page_size(self):
+        self.client.credentials()
+        response, small_page = self.count_queries(
+            'get', '/api/recipes/?limit=2')
+        self.assertLessEqual(small_page, RECIPE_LIST_QUERY_BUDGET)
+        with self.assertNumQueries(small_page):
+            self.client.get('/api/recipes/?limit=10')
+
+
+class HotPathPlansTest(FoodgramTestCase):
+    '''Hot-path querysets read indexed tables by index.'''
+
+    def test_explain_queries_finds_no_full_scans(self):
+        for recipe in self.recipes[:2]:
+            for relation in ('shopping_cart', 'favorite'):
+                response = self.client.post(
+                    f'/api/recipes/{recipe.pk}/{relation}/')
+                self.assertEqual(response.status_code, 201)
+        response = self.client.post(f'/api/users/{self.author.pk}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        call_command('explain_queries', check=True, user=self.user.pk,
+                     stdout=StringIO())
+
+    def test_full_scan_is_found(self):
+        queryset = Recipe.objects.filter(text='description')
+        plan = explain(queryset, check=True)
+        self.assertEqual(get_full_scans(queryset, plan, ('recipes_recipe',)),
+                         {'recipes_recipe'})
+
+
+class WriteQueriesTest(FoodgramTestCase):
+    '''Adding to lists takes a fixed number of queries, with savepoints.'''
+
+    def setUp(self):
+        super().setUp()
+        self.client.get('/api/users/me/')
+
+    def assert_post_queries(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(DUPLICATE_QUERIES):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_favorite(self):
+        self.assert_post_queries(
+            f'/api/recipes/{self.recipes[0].pk}/favorite/', FAVORITE_QUERIES)
+
+    def test_shopping_cart(self):
+        self.assert_post_queries(
+            f'/api/recipes/{self.recipes[0].pk}/shopping_cart/',
+            SHOPPING_CART_QUERIES)
+
+    def test_subscribe(self):
+        self.assert_post_queries(
+            f'/api/users/{self.author.pk}/subscribe/', SUBSCRIBE_QUERIES)
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db.models import Case, CharField, F, IntegerField, Value, When
+
+# Measurement unit: (base unit, amount of base unit in it, shown in lists).
+UNITS = getattr(settings, 'MEASUREMENT_UNITS', {
+    'г': ('г', 1, True),
+    'кг': ('г', 1000, True),
+    'мл': ('мл', 1, True),
+    'л': ('мл', 1000, True),
+    'ч. л.': ('мл', 5, False),
+    'ст. л.': ('мл', 15, False),
+    'стакан': ('мл', 200, False),
+    'шт': ('шт.', 1, False),
+    'шт.': ('шт.', 1, True),
+})
+
+
+def get_shown_units():
+    '''Units shown for each base unit, largest first.'''
+    shown = {}
+    for unit, (base, factor, is_shown) in UNITS.items():
+        if is_shown:
+            shown.setdefault(base, []).append((factor, unit))
+    return {base: sorted(units, reverse=True) for base, units in shown.items()}
+
+
+SHOWN_UNITS = get_shown_units()
+
+
+def base_unit(unit_field):
+    '''Expression of the base unit of the unit stored in the field.'''
+    return Case(
+        *(When(**{unit_field: unit}, then=Value(base))
+          for unit, (base, _, _) in UNITS.items() if base != unit),
+        default=F(unit_field), output_field=CharField()
+    )
+
+
+def base_amount(amount_field, unit_field):
+    '''Expression of the amount in the field converted to the base unit.'''
+    return F(amount_field) * Case(
+        *(When(**{unit_field: unit}, then=Value(factor))
+          for unit, (_, factor, _) in UNITS.items() if factor != 1),
+        default=Value(1), output_field=IntegerField()
+    )
+
+
+def get_value(amount, factor):
+    '''Amount divided by the factor, an int when whole.'''
+    value = amount / factor
+    if value.is_integer():
+        return int(value)
+    return round(value, 3)
+
+
+def present(amount, unit, source_unit=None):
+    '''Amount in the base unit shown in the largest fitting unit.
+
+    When the whole amount comes from one unit not shown in lists, such as
+    spoons, it stays in that unit.
+    '''
+    if source_unit in UNITS and not UNITS[source_unit][2]:
+        return get_value(amount, UNITS[source_unit][1]), source_unit
+    for factor, shown_unit in SHOWN_UNITS.get(unit, ()):
+        if amount >= factor:
+            return get_value(amount, factor), shown_unit
+    return amount, unit
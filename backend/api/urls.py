@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from . import views
+from . import async_views, views
 
 router_v1 = routers.DefaultRouter()
 router_v1.register('recipes', views.RecipeViewSet, basename='recipe')
@@ -14,14 +15,32 @@ urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('users/subscriptions/', views.SubscriptionViewSet.as_view(
         {'get': 'list'}), name='subscription'),
+    path('users/subscribe/', views.SubscriptionViewSet.as_view(
+        {'post': 'bulk_create', 'delete': 'bulk_destroy'}),
+        name='subscribe-bulk'),
     path('users/<int:id>/subscribe/', views.SubscriptionViewSet.as_view(
         {'post': 'create', 'delete': 'destroy'}), name='subscribe'),
+    path('recipes/favorite/', views.FavoriteViewSet.as_view(
+        {'post': 'bulk_create', 'delete': 'bulk_destroy'}),
+        name='favorite-bulk'),
     path('recipes/<int:id>/favorite/', views.FavoriteViewSet.as_view(
         {'post': 'create', 'delete': 'destroy'}), name='favorite'),
     path('recipes/<int:id>/shopping_cart/', views.ShoppingCartViewSet.as_view(
         {'post': 'create', 'delete': 'destroy'}), name='shopping-cart'),
     path('recipes/download_shopping_cart/', views.ShoppingCartViewSet.as_view(
         {'get': 'download_shopping_cart'}), name='download_cart'),
+    path('recipes/shopping_cart/', views.ShoppingCartViewSet.as_view(
+        {'get': 'totals', 'post': 'bulk_create', 'delete': 'bulk_destroy'}),
+        name='shopping-cart-totals'),
     path('', include('djoser.urls.base')),
     path('', include(router_v1.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('tags/', async_views.tag_list, name='tag-list'),
+        path('ingredients/', async_views.ingredient_list,
+             name='ingredient-list'),
+        path('recipes/download_shopping_cart/',
+             async_views.download_shopping_cart, name='download_cart'),
+    ] + urlpatterns
@@ -1,22 +1,40 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Subquery, Value
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
-from rest_framework import permissions, viewsets
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from rest_framework import permissions, renderers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from users.models import Subscription, User
 
 from . import serializers
-from .filters import IngredientSearchFilter, RecipeFilter
-from .generate_pdf import generate_pdf
+from .cart_totals import (change_cart_recipes, get_cart_totals, get_cart_users,
+                          present_totals)
+from .counters import change_counter
+from .exporters import EXPORTERS
+from .filters import RecipeFilter, order_by_score
+from .generate_pdf import invalidate_shopping_cart
+from .images import schedule_image_processing
+from .ingredient_index import ingredient_index
+from .pagination import KeysetPagination
+from .pantry_index import pantry_index
 from .permissions import IsAuthorOrAdminOrReadOnly
-from .viewsets import CreateDestroyViewSet, CreateListDestroyViewSet
+from .viewsets import (BulkRelationMixin, CreateDestroyViewSet,
+                       CreateListDestroyViewSet, ReferenceDataViewSet)
 
 
-class SubscriptionViewSet(CreateListDestroyViewSet):
+class SubscriptionViewSet(BulkRelationMixin, CreateListDestroyViewSet):
     '''Viewset for Subscription model.'''
 
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
+    keyset_field = 'subscription_id'
+    relation_model = Subscription
+    relation_field = 'author'
+    related_model = User
 
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
@@ -24,104 +42,283 @@ class SubscriptionViewSet(CreateListDestroyViewSet):
         return serializers.SubscribeSerializer
 
     def get_queryset(self):
-        queryset = self.request.user.subscriber.all()
-        return [obj.author for obj in queryset]
+        '''Paginated authors with a window of their recipes.'''
+        if self.request.method not in permissions.SAFE_METHODS:
+            return Subscription.objects.filter(user=self.request.user)
+        recipes = Recipe.objects.all()
+        recipes_limit = serializers.SubscriptionSerializer.get_recipes_limit(
+            self.request)
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:recipes_limit]
+            ))
+        return User.objects.filter(
+            subscriptions__user=self.request.user
+        ).annotate(
+            subscription_id=F('subscriptions__pk'),
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipe_author', queryset=recipes,
+                     to_attr='limited_recipes')
+        ).order_by('-subscription_id')
 
     def get_object(self):
         return get_object_or_404(Subscription, user=self.request.user,
                                  author=self.kwargs.get('id'))
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        author = get_object_or_404(User, pk=self.kwargs.get('id'))
-        serializer.save(user=self.request.user, id=author)
+        subscription = serializer.save()
+        change_counter(User.objects.filter(pk=subscription.author_id),
+                       'subscribers_count', 1)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(User.objects.filter(pk=instance.author_id),
+                       'subscribers_count', -1)
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    def is_allowed(self, pk):
+        return pk != self.request.user.pk
+
+    def relations_changed(self, ids, delta):
+        change_counter(User.objects.filter(pk__in=ids),
+                       'subscribers_count', delta)
+
+
+class TagViewSet(ReferenceDataViewSet):
     '''Viewset for Tag model.'''
 
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
-    pagination_class = None
-    permission_classes = (permissions.AllowAny,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceDataViewSet):
     '''Viewset for Ingredient model.'''
 
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
-    pagination_class = None
-    permission_classes = (permissions.AllowAny,)
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+
+    def list(self, request, *args, **kwargs):
+        '''Autocomplete by "name" parameter, "limit" caps the results.'''
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(request, self.search)
+
+    def search(self, request):
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = None
+        if limit is not None and limit < 1:
+            limit = None
+        return Response(ingredient_index.search(
+            request.query_params.get('name'), limit))
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     '''Viewset for Recipe model.'''
 
-    queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = KeysetPagination
+
+    @property
+    def keyset_field(self):
+        '''Keyset pagination works only in default "-pk" ordering.'''
+        if (self.action in ('trending', 'what_to_cook')
+                or {'ordering', 'search'} & set(self.request.GET)):
+            return None
+        return 'pk'
+
+    def get_queryset(self):
+        '''Build a page of recipes in a fixed number of queries.'''
+        user = self.request.user
+        queryset = Recipe.objects.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+        if not user.is_authenticated:
+            return queryset.select_related('author')
+        return queryset.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate(is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user, author=OuterRef('pk'))
+                ))
+            )
+        ).annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        )
 
     def get_serializer_class(self):
+        if self.action == 'what_to_cook':
+            return serializers.CookableRecipeSerializer
         if self.request.method in permissions.SAFE_METHODS:
             return serializers.GetRecipeSerializer
         return serializers.WriteRecipeSerializer
 
+    @action(detail=False)
+    def trending(self, request):
+        '''Recipes with most favorites lately, decayed with time.'''
+        queryset = order_by_score(
+            self.filter_queryset(self.get_queryset()), 'trending')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def what_to_cook(self, request):
+        '''Recipes ranked by the share of their ingredients in the pantry.'''
+        pantry = serializers.PantrySerializer(data={
+            'ingredients': request.query_params.getlist('ingredients'),
+            'min_coverage': request.query_params.get('min_coverage', 0),
+        })
+        pantry.is_valid(raise_exception=True)
+        page = self.paginate_queryset(pantry_index.match(
+            pantry.validated_data['ingredients'],
+            pantry.validated_data['min_coverage']
+        ))
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page])
+        found = []
+        for recipe_id, matched, total in page:
+            if recipe_id in recipes:
+                recipes[recipe_id].coverage = round(matched / total, 2)
+                found.append(recipes[recipe_id])
+        serializer = self.get_serializer(found, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        return serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        schedule_image_processing(recipe.pk)
+        change_counter(User.objects.filter(pk=self.request.user.pk),
+                       'recipes_count', 1)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        recipe = serializer.save()
+        if 'image' in serializer.validated_data:
+            schedule_image_processing(recipe.pk)
 
-class FavoriteViewSet(CreateDestroyViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        change_cart_recipes(list(get_cart_users(instance)), (instance.pk,), -1)
+        change_counter(User.objects.filter(cart_user__recipe=instance),
+                       'shopping_cart_count', -1)
+        instance.delete()
+        change_counter(User.objects.filter(pk=instance.author_id),
+                       'recipes_count', -1)
+
+
+class FavoriteViewSet(BulkRelationMixin, CreateDestroyViewSet):
     '''Viewset for Favorite model.'''
 
     queryset = Favorite.objects.all()
     serializer_class = serializers.FavoriteSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    relation_model = Favorite
+    relation_field = 'recipe'
+    related_model = Recipe
 
     def get_object(self):
         return get_object_or_404(Favorite, user=self.request.user,
                                  recipe_id=self.kwargs.get('id'))
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        recipe_id = get_object_or_404(Recipe, pk=self.kwargs.get('id'))
-        serializer.save(user=self.request.user, id=recipe_id)
+        favorite = serializer.save()
+        change_counter(Recipe.objects.filter(pk=favorite.recipe_id),
+                       'favorites_count', 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(Recipe.objects.filter(pk=instance.recipe_id),
+                       'favorites_count', -1)
 
+    def relations_changed(self, ids, delta):
+        change_counter(Recipe.objects.filter(pk__in=ids),
+                       'favorites_count', delta)
 
-class ShoppingCartViewSet(CreateDestroyViewSet):
+
+class ShoppingCartViewSet(BulkRelationMixin, CreateDestroyViewSet):
     '''Viewset for ShoppingCart model.'''
 
     queryset = ShoppingCart.objects.all()
     serializer_class = serializers.ShoppingCartSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    relation_model = ShoppingCart
+    relation_field = 'recipe'
+    related_model = Recipe
 
     def get_object(self):
         return get_object_or_404(ShoppingCart, user=self.request.user,
                                  recipe_id=self.kwargs.get('id'))
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        recipe_id = get_object_or_404(Recipe, pk=self.kwargs.get('id'))
-        serializer.save(user=self.request.user, id=recipe_id)
+        cart_item = serializer.save()
+        change_counter(User.objects.filter(pk=self.request.user.pk),
+                       'shopping_cart_count', 1)
+        change_cart_recipes((self.request.user.pk,), (cart_item.recipe_id,))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(User.objects.filter(pk=self.request.user.pk),
+                       'shopping_cart_count', -1)
+        change_cart_recipes((self.request.user.pk,), (instance.recipe_id,), -1)
+
+    def relations_changed(self, ids, delta):
+        user = self.request.user
+        change_counter(User.objects.filter(pk=user.pk),
+                       'shopping_cart_count', delta * len(ids))
+        change_cart_recipes((user.pk,), ids, delta)
+        invalidate_shopping_cart((user.pk,))
 
     def get_ingredients_list(self):
-        '''Transform recipes into a list of unique ingredients.'''
-        recipes_in_cart = Recipe.objects.filter(
-            cart_recipe__user=self.request.user).values_list(
-                'ingredients__name',
-                'recipe_ingredient__amount',
-                'ingredients__measurement_unit'
-        )
-        return recipes_in_cart.values(
-            'ingredients__name', 'ingredients__measurement_unit').annotate(
-                total=Sum('recipe_ingredient__amount')).order_by('-total')
+        '''Shopping list with amounts of one product in one unit summed.'''
+        return present_totals(get_cart_totals(self.request.user))
+
+    def totals(self, request):
+        '''Current totals of the shopping list as JSON.'''
+        serializer = serializers.ShoppingCartTotalSerializer(
+            self.get_ingredients_list(), many=True)
+        return Response(serializer.data)
+
+    def get_renderers(self):
+        if self.action == 'download_shopping_cart':
+            return [exporter() for exporter in EXPORTERS]
+        return super().get_renderers()
+
+    def handle_exception(self, exc):
+        if self.action == 'download_shopping_cart':
+            self.request.accepted_renderer = renderers.JSONRenderer()
+            self.request.accepted_media_type = (
+                renderers.JSONRenderer.media_type
+            )
+        return super().handle_exception(exc)
 
     def download_shopping_cart(self, request):
-        '''Download shopping list as PDF-file.'''
-        cart = self.get_ingredients_list()
-        response = HttpResponse(content_type='application/pdf')
+        '''Download shopping list in the format negotiated by the client.'''
+        exporter = request.accepted_renderer
+        response = StreamingHttpResponse(
+            exporter.stream(self.get_ingredients_list, request.user),
+            content_type=exporter.content_type
+        )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_cart.pdf"'
+            f'attachment; filename="shopping_cart.{exporter.format}"'
         )
-        cart = self.get_ingredients_list()
-        return generate_pdf(self, response, cart)
+        return response
@@ -1,4 +1,14 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.response import Response
+
+from .base_serializers import BulkIdsSerializer
+from .reference_data import get_data_key, get_etag
 
 
 class CreateDestroyViewSet(mixins.CreateModelMixin,
@@ -15,3 +25,129 @@ class CreateListDestroyViewSet(CreateDestroyViewSet,
     '''Base viewset for getting list, creating and destroying objects.'''
 
     pass
+
+
+class BulkRelationMixin:
+    '''Batch endpoints relating the user to many objects at once.
+
+    Subclasses name the relation model, its foreign key to the related
+    objects and their model, and update counters in "relations_changed".
+    Ids are checked in one query, relations are inserted in one bulk
+    insert and removed in one filtered delete, while the user's row is
+    locked so that concurrent batches do not count a relation twice.
+    '''
+
+    relation_model = None
+    relation_field = None
+    related_model = None
+
+    def get_bulk_ids(self, request):
+        '''Requested ids without repeats, in the original order.'''
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['ids']))
+
+    def get_relations(self, ids):
+        return self.relation_model.objects.filter(
+            user=self.request.user, **{f'{self.relation_field}__in': ids})
+
+    def lock_user(self):
+        return list(get_user_model().objects.select_for_update().filter(
+            pk=self.request.user.pk).values_list('pk', flat=True))
+
+    def is_allowed(self, pk):
+        '''Whether the user may relate to the object, e.g. not to self.'''
+        return True
+
+    def relations_changed(self, ids, delta):
+        '''Hook called with ids of added (1) or removed (-1) relations.'''
+        pass
+
+    @transaction.atomic
+    def bulk_create(self, request):
+        ids = self.get_bulk_ids(request)
+        self.lock_user()
+        found = set(self.related_model.objects.filter(
+            pk__in=ids).values_list('pk', flat=True))
+        existing = set(self.get_relations(ids).values_list(
+            self.relation_field, flat=True))
+        results = []
+        created = []
+        for pk in ids:
+            if pk not in found:
+                status_name = 'not_found'
+            elif not self.is_allowed(pk):
+                status_name = 'not_allowed'
+            elif pk in existing:
+                status_name = 'exists'
+            else:
+                status_name = 'created'
+                created.append(pk)
+            results.append({'id': pk, 'status': status_name})
+        self.relation_model.objects.bulk_create(
+            (self.relation_model(
+                user=request.user, **{f'{self.relation_field}_id': pk})
+             for pk in created),
+            ignore_conflicts=True
+        )
+        if created:
+            self.relations_changed(created, 1)
+        return Response(results)
+
+    @transaction.atomic
+    def bulk_destroy(self, request):
+        ids = self.get_bulk_ids(request)
+        self.lock_user()
+        relations = self.get_relations(ids)
+        deleted = set(relations.values_list(self.relation_field, flat=True))
+        if deleted:
+            relations.delete()
+            self.relations_changed(
+                [pk for pk in ids if pk in deleted], -1)
+        return Response([
+            {'id': pk, 'status': 'deleted' if pk in deleted else 'not_found'}
+            for pk in ids
+        ])
+
+
+class ReferenceDataViewSet(viewsets.ReadOnlyModelViewSet):
+    '''Base viewset for rarely changing data, cached until it changes.
+
+    Responses carry a strong ETag built from the data version, so clients
+    can revalidate with If-None-Match and get 304 Not Modified.
+    '''
+
+    pagination_class = None
+    permission_classes = (permissions.AllowAny,)
+
+    def get_etag(self):
+        return get_etag(self.get_queryset().model)
+
+    def get_cached_response(self, request, view, *args, **kwargs):
+        '''Serve the view's data from cache while the version holds.'''
+        etag = self.get_etag()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = get_data_key(etag, request)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data,
+                          settings.REFERENCE_DATA_CACHE_TIMEOUT)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True,
+                            max_age=settings.REFERENCE_DATA_MAX_AGE)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().retrieve, *args, **kwargs)
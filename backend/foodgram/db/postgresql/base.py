@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+Database = base.Database
+
+
+class ConnectionPool:
+    '''Bounded pool of connections shared by the threads of one worker.
+
+    At most "size" connections are open at once, a thread asking for one
+    more waits up to "timeout" seconds for a connection to be returned.
+    '''
+
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.stats = {
+            'size': size, 'open': 0, 'waits': 0, 'wait_time': 0.0,
+            'max_wait': 0.0, 'timeouts': 0,
+        }
+
+    def acquire(self, connect):
+        '''Idle connection or a new one, and seconds spent waiting.'''
+        start = time.perf_counter()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        wait = time.perf_counter() - start
+        with self.lock:
+            self.stats['waits'] += 1
+            self.stats['wait_time'] += wait
+            self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+            if not acquired:
+                self.stats['timeouts'] += 1
+        if not acquired:
+            raise Database.OperationalError(
+                f'No database connection available in {self.timeout}s')
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if not connection.closed:
+                return connection, wait
+            self.discard()
+        try:
+            connection = connect()
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.stats['open'] += 1
+        return connection, wait
+
+    def release(self, connection):
+        '''Take back a connection, closing it if it is not clean.'''
+        try:
+            if (not connection.closed and connection.get_transaction_status()
+                    != Database.extensions.TRANSACTION_STATUS_IDLE):
+                connection.rollback()
+        except Database.Error:
+            pass
+        if connection.closed:
+            self.discard()
+        else:
+            self.idle.put(connection)
+        self.slots.release()
+
+    def discard(self):
+        with self.lock:
+            self.stats['open'] -= 1
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''PostgreSQL backend with health checks and an optional pool.
+
+    With CONN_HEALTH_CHECKS a reused connection is checked once per
+    request before its first query and replaced if the server dropped it.
+    POOL_SIZE above zero keeps a pool of connections per worker process,
+    connections are returned to it when Django closes them.
+    '''
+
+    pools = {}
+    pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool_wait = 0.0
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get('POOL_SIZE', 0)
+        if not size:
+            return None
+        with self.pools_lock:
+            if self.alias not in self.pools:
+                self.pools[self.alias] = ConnectionPool(
+                    size, self.settings_dict.get('POOL_TIMEOUT', 30))
+            return self.pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection, wait = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params)
+        )
+        self.pool_wait += wait
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        return pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        super().ensure_connection()
+        if (self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.health_check_done
+                and not self.in_atomic_block):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.connection.close()
+                self.close()
+                super().ensure_connection()
@@ -0,0 +1,72 @@
+import asyncio
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+REPLICA_MODELS = {
+    'recipes.tag', 'recipes.ingredient', 'recipes.recipe',
+    'recipes.recipetag', 'recipes.recipeingredient', 'recipes.recipescore',
+}
+
+read_only_request = ContextVar('read_only_request', default=False)
+
+
+class ReplicaRoutingMiddleware:
+    '''Mark GET and HEAD requests as safe to read from the replica.
+
+    Runs in the event loop under ASGI, so that async views are not moved
+    to a thread by it.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_only_request.set(request.method in ('GET', 'HEAD'))
+        try:
+            return self.get_response(request)
+        finally:
+            read_only_request.reset(token)
+
+    async def __acall__(self, request):
+        token = read_only_request.set(request.method in ('GET', 'HEAD'))
+        try:
+            return await self.get_response(request)
+        finally:
+            read_only_request.reset(token)
+
+
+class ReplicaRouter:
+    '''Send reads of recipes, tags and ingredients to the replica.
+
+    Only reads made by GET and HEAD requests outside transactions go
+    there, so a client reading back what it has just written in the same
+    request always gets it from the primary database.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if (REPLICA in settings.DATABASES
+                and model._meta.label_lower in REPLICA_MODELS
+                and read_only_request.get()
+                and not connections['default'].in_atomic_block):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
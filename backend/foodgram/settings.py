@@ -1,9 +1,25 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def getenv_number(name, default, cast=int):
+    '''Number from the environment, the default when unset or empty.'''
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def getenv_bool(name, default=False):
+    '''Flag from the environment, the default when unset or empty.'''
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -21,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'colorfield',
@@ -36,6 +53,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    'api.profiling.QueryProfilingMiddleware',
+    'foodgram.db.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,18 +84,95 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+ASYNC_VIEWS = bool(os.getenv('ASYNC_VIEWS', default=False))
+
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': os.getenv('DB_ENGINE', default='foodgram.db.postgresql'),
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': getenv_number('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': getenv_bool('DB_CONN_HEALTH_CHECKS'),
+        'POOL_SIZE': getenv_number('DB_POOL_SIZE', 0),
+        'POOL_TIMEOUT': getenv_number('DB_POOL_TIMEOUT', 30, cast=float),
     }
 }
 
+if DATABASES['default']['POOL_SIZE']:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db.routers.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+# Number of worker processes, also read by Gunicorn. Several workers need a
+# shared CACHE_BACKEND, see api/checks.py.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', default=1))
+
+REFERENCE_DATA_CACHE_TIMEOUT = int(os.getenv('REFERENCE_DATA_CACHE_TIMEOUT', default=24 * 60 * 60))
+
+REFERENCE_DATA_MAX_AGE = int(os.getenv('REFERENCE_DATA_MAX_AGE', default=60))
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', default=1000))
+
+TRENDING_HALF_LIFE_DAYS = float(os.getenv('TRENDING_HALF_LIFE_DAYS', default=7))
+
+IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', default='WEBP')
+
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', default=80))
+
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', default=1600))
+
+IMAGE_MAX_UPLOAD_SIZE = int(os.getenv('IMAGE_MAX_UPLOAD_SIZE', default=5 * 1024 * 1024))
+
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2 * IMAGE_MAX_UPLOAD_SIZE
+
+IMAGE_RENDITIONS = {
+    'card': (480, 480),
+    'list': (240, 240),
+    'detail': (960, 960),
+}
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+
+PROFILING = {
+    'ENABLED': bool(os.getenv('PROFILING_ENABLED', default=False)),
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', default=1.0)),
+    'BUFFER_SIZE': int(os.getenv('PROFILING_BUFFER_SIZE', default=1000)),
+    'HEADERS': bool(os.getenv('PROFILING_HEADERS', default=False)),
+}
+
+# Profiling ring buffer has a cache of its own, shared by processes through
+# files, so samples neither evict nor get evicted by the default cache.
+CACHES['profiling'] = {
+    'BACKEND': os.getenv('PROFILING_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': os.getenv('PROFILING_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'foodgram_profiling')),
+    'TIMEOUT': None,
+    'OPTIONS': {'MAX_ENTRIES': PROFILING['BUFFER_SIZE'] + 2},
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -100,13 +196,23 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageLimitPagination',
 
     'PAGE_SIZE': 6,
 }
 
+AUTH_TOKEN_CACHE = {
+    'TIMEOUT': int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', default=60)),
+    'LOCAL_TIMEOUT': float(os.getenv('AUTH_TOKEN_CACHE_LOCAL_TIMEOUT', default=5)),
+    'LOCAL_SIZE': int(os.getenv('AUTH_TOKEN_CACHE_LOCAL_SIZE', default=1024)),
+}
+
+KEYSET_PAGINATION_COUNT = os.getenv('KEYSET_PAGINATION_COUNT', default='exact')
+
+KEYSET_PAGINATION_COUNT_LIMIT = int(os.getenv('KEYSET_PAGINATION_COUNT_LIMIT', default=1000))
+
 
 DJOSER = {
     'HIDE_USERS': False,
@@ -2,8 +2,8 @@ from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django.forms import BaseInlineFormSet
 
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, RecipeTag,
-                     ShoppingCart, Tag)
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     RecipeScore, RecipeTag, ShoppingCart, Tag)
 
 
 class AtLeastOneFormSet(BaseInlineFormSet):
@@ -50,9 +50,10 @@ class RecipeAdmin(admin.ModelAdmin):
     list_per_page = 15
     empty_value_display = '-empty-'
 
-    @admin.display(description='Added to Favorites')
+    @admin.display(description='Added to Favorites',
+                   ordering='favorites_count')
     def in_favorited(self, obj):
-        return f'{Favorite.objects.filter(recipe=obj).count()} times'
+        return f'{obj.favorites_count} times'
 
 
 @admin.register(Favorite)
@@ -85,3 +86,10 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_editable = ('user', 'recipe')
     list_per_page = 15
     empty_value_display = '-empty-'
+
+
+@admin.register(RecipeScore)
+class RecipeScoreAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'popularity', 'trending', 'computed')
+    list_per_page = 15
+    empty_value_display = '-empty-'
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import os
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from recipes.models import Ingredient
+
+FIXTURE_MODEL = 'recipes.ingredient'
+
+
+def read_csv(path):
+    '''Yield (pk, name, measurement_unit) rows from CSV file.'''
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        for name, measurement_unit in csv.reader(csv_file, delimiter=','):
+            yield None, name, measurement_unit
+
+
+def read_json(path):
+    '''Yield rows from a list of ingredients or a Django fixture.'''
+    with open(path, encoding='utf-8') as json_file:
+        data = json.load(json_file)
+    for item in data:
+        if 'model' not in item:
+            yield None, item['name'], item['measurement_unit']
+        elif item['model'] == FIXTURE_MODEL:
+            yield (item.get('pk'), item['fields']['name'],
+                   item['fields']['measurement_unit'])
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+def read_rows(path):
+    '''Pick a reader by file extension.'''
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f'Unsupported file type: {path}')
+    return READERS[extension](path)
+
+
+def unique_rows(rows):
+    '''Skip rows repeating (name, measurement_unit) seen earlier.'''
+    seen = set()
+    for row in rows:
+        key = row[1:]
+        if key not in seen:
+            seen.add(key)
+            yield row
+
+
+def batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkCreateWriter:
+    '''Insert batches with bulk_create, skipping existing ingredients.'''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def write(self, batch):
+        Ingredient.objects.bulk_create(
+            (Ingredient(pk=pk, name=name, measurement_unit=measurement_unit)
+             for pk, name, measurement_unit in batch),
+            ignore_conflicts=True
+        )
+
+
+class CopyWriter(BulkCreateWriter):
+    '''Stream batches into a temporary table with COPY FROM STDIN.
+
+    Rows are moved to the ingredients table with INSERT ... ON CONFLICT
+    DO NOTHING, so loading the same file twice adds nothing.
+    '''
+
+    table = Ingredient._meta.db_table
+
+    def __enter__(self):
+        self.cursor = connection.cursor()
+        self.cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_import '
+            '(id integer, name varchar(200), measurement_unit varchar(200)) '
+            'ON COMMIT DROP'
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+    def write(self, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ('' if pk is None else pk, name, measurement_unit)
+            for pk, name, measurement_unit in batch
+        )
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            'COPY ingredient_import (id, name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)', buffer
+        )
+        self.cursor.execute(
+            f'INSERT INTO {self.table} (id, name, measurement_unit) '
+            f"SELECT COALESCE(id, nextval(pg_get_serial_sequence("
+            f"'{self.table}', 'id'))), name, measurement_unit "
+            f'FROM ingredient_import ON CONFLICT DO NOTHING'
+        )
+        self.cursor.execute('TRUNCATE ingredient_import')
+        if any(pk is not None for pk, *_ in batch):
+            reset_sequence()
+
+
+def reset_sequence():
+    '''Move primary key sequence past the explicitly loaded ids.'''
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Ingredient]):
+            cursor.execute(sql)
+
+
+def get_writer():
+    if connection.vendor == 'postgresql':
+        return CopyWriter()
+    return BulkCreateWriter()
+
+
+def bulk_import(paths, batch_size, report=None):
+    '''Load ingredients from the files in batches, return rows processed.'''
+    processed = 0
+    rows = unique_rows(row for path in paths for row in read_rows(path))
+    with transaction.atomic(), get_writer() as writer:
+        for batch in batches(rows, batch_size):
+            writer.write(batch)
+            processed += len(batch)
+            if report is not None:
+                report(processed)
+    return processed
@@ -0,0 +1,41 @@
+from api.reference_data import bump_version
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Ingredient
+
+from ._bulk_import import bulk_import
+
+
+class Command(BaseCommand):
+    '''Bulk load ingredients from CSV, JSON or fixture files.'''
+
+    help = ('Load ingredients from CSV, JSON or fixture files, '
+            'skipping ones already in the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['data/ingredients.csv'],
+            help='.csv or .json files, data/ingredients.csv by default.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows sent to the database at once.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size should be a positive number')
+        before = Ingredient.objects.count()
+        try:
+            processed = bulk_import(
+                options['paths'], options['batch_size'],
+                report=lambda count: self.stdout.write(
+                    f'Processed {count} rows')
+            )
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Data not loaded: {error!r}')
+        bump_version(Ingredient)
+        added = Ingredient.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Data uploaded successfully: {added} of {processed} '
+            f'unique rows were new'
+        ))
@@ -0,0 +1,19 @@
+from api.images import process_image
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    '''Re-encode recipe images and render their thumbnails.'''
+
+    help = ('Process images of recipes without thumbnails, e.g. after '
+            'loading fixtures and media.')
+
+    def handle(self, *args, **options):
+        processed = 0
+        for pk, image, renditions in Recipe.objects.values_list(
+                'pk', 'image', 'image_renditions').iterator():
+            if image and renditions.get('source') != image:
+                process_image(pk)
+                processed += 1
+        self.stdout.write(f'Processed {processed} images')
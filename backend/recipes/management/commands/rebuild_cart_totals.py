@@ -0,0 +1,13 @@
+from api.cart_totals import rebuild_cart_totals
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    '''Recompute shopping list totals of all users.'''
+
+    help = ('Recompute shopping list totals from shopping lists, e.g. after '
+            'loading fixtures or editing recipes in admin.')
+
+    def handle(self, *args, **options):
+        rebuild_cart_totals()
+        self.stdout.write('Shopping list totals rebuilt')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscription, 'author'),
+    (User, 'shopping_cart_count', ShoppingCart, 'user'),
+)
+
+
+def actual_count(model, field):
+    '''Subquery counting model rows pointing to the outer row.'''
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    '''Recalculate denormalized counters which drifted from actual data.'''
+
+    help = 'Repair favorites, recipes, subscribers and shopping cart counters.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for model, counter, counted_model, field in COUNTERS:
+            count = actual_count(counted_model, field)
+            repaired = model.objects.exclude(**{counter: count}).update(
+                **{counter: count})
+            self.stdout.write(
+                f'{model._meta.verbose_name} {counter}: {repaired} repaired')
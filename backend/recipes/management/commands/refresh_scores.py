@@ -0,0 +1,77 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone as django_timezone
+from recipes.models import Favorite, Recipe, RecipeScore
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_exponent(created):
+    '''Favorite weight in log space, growing with time since epoch.
+
+    Weights of all favorites shrink by the same factor as time goes on,
+    so ranking by the sum of exp(exponent) equals ranking by favorites
+    decayed to the present moment, and scores of recipes without new
+    favorites never have to be recomputed. Favorites older than the epoch
+    weigh as much as ones made at it.
+    '''
+    half_life = settings.TRENDING_HALF_LIFE_DAYS * 24 * 60 * 60
+    age = max(created - EPOCH, timedelta(0))
+    return age.total_seconds() * math.log(2) / half_life
+
+
+def log_sum_exp(exponents):
+    top = max(exponents)
+    return top + math.log(sum(math.exp(value - top) for value in exponents))
+
+
+class Command(BaseCommand):
+    '''Recompute popularity and trending scores of changed recipes.'''
+
+    help = ('Refresh scores of recipes favorited, unfavorited or created '
+            'since the last run, or of all recipes with --full.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute scores of all recipes.'
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        now = django_timezone.now()
+        recipes = Recipe.objects.all()
+        if not options['full']:
+            last_run = RecipeScore.objects.aggregate(
+                last_run=Max('computed'))['last_run']
+            changed = (
+                Q(score__isnull=True)
+                | ~Q(score__popularity=F('favorites_count'))
+            )
+            if last_run is not None:
+                changed |= Q(recipe_favorite__created__gte=last_run)
+            recipes = recipes.filter(changed)
+        recipe_ids = set(recipes.values_list('pk', flat=True))
+        exponents = defaultdict(list)
+        for recipe_id, created in Favorite.objects.filter(
+                recipe_id__in=recipe_ids, created__lt=now
+        ).values_list('recipe_id', 'created').iterator():
+            exponents[recipe_id].append(decay_exponent(created))
+        RecipeScore.objects.filter(pk__in=recipe_ids).delete()
+        RecipeScore.objects.bulk_create(
+            RecipeScore(
+                recipe_id=recipe_id,
+                popularity=len(exponents[recipe_id]),
+                # log(1 + sum), so any favorite ranks above none.
+                trending=log_sum_exp([0] + exponents[recipe_id]),
+                computed=now,
+            )
+            for recipe_id in recipe_ids
+        )
+        self.stdout.write(f'Scores refreshed for {len(recipe_ids)} recipes')
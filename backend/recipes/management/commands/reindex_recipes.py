@@ -0,0 +1,14 @@
+from api.recipe_search import update_search_vectors
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    '''Recompute full-text search vectors of all recipes.'''
+
+    help = ('Recompute search vectors of all recipes, e.g. after loading '
+            'fixtures or renaming ingredients.')
+
+    def handle(self, *args, **options):
+        update_search_vectors(Recipe.objects.all())
+        self.stdout.write('Search vectors updated')
@@ -1,8 +1,12 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
+from .indexes import SearchVectorIndex
+
 
 class Tag(models.Model):
     name = models.CharField(
@@ -45,6 +49,19 @@ class Ingredient(models.Model):
         verbose_name = 'ingredient'
         verbose_name_plural = 'ingredients'
         ordering = ('pk',)
+        indexes = [
+            models.Index(
+                name='ingredient_name_prefix_idx',
+                fields=('name',),
+                opclasses=('varchar_pattern_ops',),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_ingredient',
+                fields=('name', 'measurement_unit'),
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -77,6 +94,12 @@ class Recipe(models.Model):
         'image',
         upload_to='media/recipes/',
     )
+    image_renditions = models.JSONField(
+        'image renditions',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         'description',
         max_length=1500,
@@ -88,11 +111,31 @@ class Recipe(models.Model):
             MaxValueValidator(240)
         )
     )
+    favorites_count = models.PositiveIntegerField(
+        'added to favorites',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        'search vector',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'recipe'
         verbose_name_plural = 'recipes'
         ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                name='recipe_author_idx',
+                fields=('author', '-id'),
+            ),
+            SearchVectorIndex(
+                name='recipe_search_vector_idx',
+                fields=('search_vector',),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -116,6 +159,12 @@ class RecipeTag(models.Model):
         verbose_name = 'tag of recipe'
         verbose_name_plural = 'tags of recipe'
         ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                name='recipetag_tag_recipe_idx',
+                fields=('tag', 'recipe'),
+            ),
+        ]
 
     def __str__(self):
         return f'tag {self.tag.slug} of recipe {self.recipe.name}'
@@ -146,6 +195,17 @@ class RecipeIngredient(models.Model):
         verbose_name = 'recipe`s ingredient'
         verbose_name_plural = 'recipes` ingredients'
         ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                name='recipeingredient_recipe_idx',
+                fields=('recipe', 'ingredient'),
+                include=('amount',),
+            ),
+            models.Index(
+                name='recipeingredient_ingr_idx',
+                fields=('ingredient', 'recipe'),
+            ),
+        ]
 
     def __str__(self):
         return f'ingredient {self.ingredient.name} in {self.recipe.name}'
@@ -164,6 +224,11 @@ class Favorite(models.Model):
         verbose_name='recipe',
         related_name='recipe_favorite'
     )
+    created = models.DateTimeField(
+        'added',
+        default=timezone.now,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'favorite'
@@ -207,3 +272,66 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.recipe.name} in shopping list of {self.user.username}'
+
+
+class ShoppingCartTotal(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='user',
+        related_name='cart_totals'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='ingredient',
+        related_name='cart_totals'
+    )
+    amount = models.PositiveIntegerField(
+        'total amount',
+    )
+
+    class Meta:
+        verbose_name = 'shopping list total'
+        verbose_name_plural = 'shopping list totals'
+        ordering = ('-amount',)
+        constraints = [
+            models.UniqueConstraint(
+                name='one_total_per_ingredient',
+                fields=('user', 'ingredient'),
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.amount} of ingredient {self.ingredient_id}'
+
+
+class RecipeScore(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='recipe',
+        related_name='score'
+    )
+    popularity = models.PositiveIntegerField(
+        'times added to favorites',
+        default=0,
+        db_index=True,
+    )
+    trending = models.FloatField(
+        'time-decayed favorites',
+        default=0,
+        db_index=True,
+    )
+    computed = models.DateTimeField(
+        'computed at',
+    )
+
+    class Meta:
+        verbose_name = 'recipe score'
+        verbose_name_plural = 'recipe scores'
+        ordering = ('-popularity',)
+
+    def __str__(self):
+        return f'score of recipe {self.recipe_id}'
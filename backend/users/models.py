@@ -22,6 +22,21 @@ class User(AbstractUser):
         'last name',
         max_length=150,
     )
+    recipes_count = models.PositiveIntegerField(
+        'recipes',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'subscribers',
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'recipes in shopping cart',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'user'
@@ -50,6 +65,12 @@ class Subscription(models.Model):
         verbose_name = 'subscription'
         verbose_name_plural = 'subscriptions'
         ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                name='subscription_user_idx',
+                fields=('user', '-id'),
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 name='no_double_subscribe',